@@ -0,0 +1,64 @@
+"""
+This benchmark shows the cost per scheduled action when an agent controls thousands of actuators at each step,
+comparing the list of action dictionaries unpacked by ``Model.step`` with the bulk ``EventQueue.schedule_events``
+against pre-registered control keys. The time includes the trigger of each step. EnergyPlus is not needed.
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from eventqueue import EventQueue
+
+zones = 1000
+steps = 100
+actions_per_step = 2 * zones
+names = [f"ZONE-{i}" for i in range(zones)]
+rng = np.random.default_rng(0)
+
+
+def schedule_dicts():
+    queue = EventQueue(compact=True)
+    for step in range(steps):
+        values = 20 + 4 * rng.random(actions_per_step)
+        actions = list()
+        for i, zone in enumerate(names):
+            actions.append({"value": values[2 * i],
+                            "start_time": step + 1,
+                            "priority": 0,
+                            "component_type": "Zone Temperature Control",
+                            "control_type": "Cooling Setpoint",
+                            "actuator_key": zone})
+            actions.append({"value": values[2 * i + 1],
+                            "start_time": step + 1,
+                            "priority": 0,
+                            "component_type": "Zone Temperature Control",
+                            "control_type": "Heating Setpoint",
+                            "actuator_key": zone})
+        for action in actions:
+            queue.schedule_event(**action)
+        queue.trigger(step)
+
+
+def schedule_bulk():
+    queue = EventQueue(compact=True)
+    keys = np.array([queue.register_key(component_type="Zone Temperature Control",
+                                        control_type=control_type,
+                                        actuator_key=zone)
+                     for zone in names for control_type in ("Cooling Setpoint", "Heating Setpoint")])
+    for step in range(steps):
+        values = 20 + 4 * rng.random(actions_per_step)
+        queue.schedule_events(keys, values, step + 1)
+        queue.trigger(step)
+
+
+for name, func in (("schedule_event with dicts", schedule_dicts), ("schedule_events in bulk", schedule_bulk)):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<27} {best / steps / actions_per_step * 1e6:8.3f} us/action")
@@ -0,0 +1,51 @@
+"""
+This benchmark compares the cold (text parsing) and warm (binary parse cache) latency of loading the shipped prototype
+buildings, both for ``cache.load_idf`` alone and for the whole ``Model.__init__``.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, root)
+os.chdir(root)
+
+import cache
+from model import Model
+
+Model.set_energyplus_folder("/usr/local/EnergyPlus-9-3-0/")
+
+prototypes = [("multi", "1A", "gas", "slab"),
+              ("multi", "4A", "electric", "crawlspace"),
+              ("multi", "7", "pump", "heated")]
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+with tempfile.TemporaryDirectory() as folder:
+    cache.set_cache_folder(folder)
+    # Parse the IDD before timing, so both runs only measure the IDF loading
+    cache.load_idd()
+    for prototype, climate_zone, heating_type, foundation_type in prototypes:
+        arguments = {"prototype": prototype,
+                     "climate_zone": climate_zone,
+                     "heating_type": heating_type,
+                     "foundation_type": foundation_type}
+        name = '_'.join(arguments.values())
+        path = os.path.join("buildings", f"{name}.idf")
+        cold = timed(lambda: cache.load_idf(path))
+        warm = timed(lambda: cache.load_idf(path))
+        print(f"{name:<30} load_idf  cold {cold:8.3f} s  warm {warm:8.3f} s  speedup {cold / warm:6.1f}x")
+
+        # The cache of this building is already written, so remove it to time a cold Model
+        for cached in os.listdir(os.path.join(folder, "idfdata")):
+            os.remove(os.path.join(folder, "idfdata", cached))
+        cold = timed(lambda: Model(**arguments).close())
+        warm = timed(lambda: Model(**arguments).close())
+        print(f"{name:<30} Model     cold {cold:8.3f} s  warm {warm:8.3f} s  speedup {cold / warm:6.1f}x")
@@ -0,0 +1,35 @@
+"""
+This benchmark measures the startup budget of a fresh process: ``import model`` plus the first ``Model(...)``, with a
+cold cache (the IDD and IDF are parsed from text) and a warm cache (both are loaded from the binary cache).
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+energyplus_folder = "/usr/local/EnergyPlus-9-3-0/"
+
+import_budget = 1.0  # seconds
+first_model_budget = 1.0  # seconds, with a warm cache
+
+script = f"""
+import time
+start = time.perf_counter()
+from model import Model
+imported = time.perf_counter()
+Model.set_energyplus_folder({energyplus_folder!r})
+Model(idf_file_name="./buildings/5ZoneAirCooled.idf").close()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+with tempfile.TemporaryDirectory() as folder:
+    environment = dict(os.environ, COBS_CACHE=folder)
+    for name in ("cold", "warm"):
+        output = subprocess.run([sys.executable, "-c", script], cwd=root, env=environment,
+                                capture_output=True, text=True, check=True).stdout
+        import_time, first_model_time = map(float, output.split())
+        print(f"{name:<5} import model {import_time:6.3f} s  first Model(...) {first_model_time:6.3f} s")
+    print(f"Budget: import model {import_budget} s ({'pass' if import_time <= import_budget else 'fail'}), "
+          f"first Model(...) {first_model_budget} s ({'pass' if first_model_time <= first_model_budget else 'fail'})")
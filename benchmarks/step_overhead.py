@@ -0,0 +1,92 @@
+"""
+This benchmark measures the per-step cost of ``Model._step_callback`` for a year-long run, without EnergyPlus. The
+callback is driven by a stub exchange API that returns constant values, so the timing only contains the work done by
+COBS: reading the observation spec, wrapping the state, triggering the EventQueue and applying the changed actions.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model import Model
+
+Model.set_energyplus_folder("/usr/local/EnergyPlus-9-3-0/")
+
+steps = 6 * 24 * 365  # A year-long run at 6 steps per hour
+
+
+class StubExchange:
+    """
+    Stand in for ``pyenergyplus`` ``DataExchange`` with constant values and counting handles.
+    """
+
+    def __init__(self):
+        self.handles = dict()
+
+    def api_data_fully_ready(self):
+        return True
+
+    def _get_handle(self, *target):
+        return self.handles.setdefault(target, len(self.handles))
+
+    def get_variable_handle(self, variable_name, key):
+        return self._get_handle("variable", variable_name, key)
+
+    def get_meter_handle(self, meter_name):
+        return self._get_handle("meter", meter_name)
+
+    def get_internal_variable_handle(self, variable_type, key):
+        return self._get_handle("internal", variable_type, key)
+
+    def get_actuator_handle(self, component_type, control_type, actuator_key):
+        return self._get_handle("actuator", component_type, control_type, actuator_key)
+
+    def get_global_handle(self, var_name):
+        return self._get_handle("global", var_name)
+
+    def get_variable_value(self, handle):
+        return 21.0
+
+    def get_meter_value(self, handle):
+        return 1000.0
+
+    def get_internal_variable_value(self, handle):
+        return 1.0
+
+    def set_actuator_value(self, handle, value):
+        pass
+
+    def set_global_value(self, handle, value):
+        pass
+
+
+class StubAPI:
+    def __init__(self):
+        self.exchange = StubExchange()
+
+
+model = Model(idf_file_name="./buildings/5ZoneAirCooled.idf",
+              weather_file="./weathers/USA_IL_Chicago-OHare.Intl.AP.725300_TMY3.epw")
+model.add_configuration("Output:Variable", values={"Variable Name": "Zone Thermal Comfort Fanger Model PMV",
+                                                   "Reporting_Frequency": "timestep"})
+model._init_simulation()
+model.api = StubAPI()
+model._initialization()
+
+# Change the setpoint of every zone once per hour, so the actions are applied on a sixth of the steps
+for zone in model.zone_names:
+    for hour in range(steps // 6):
+        model.queue.schedule_event(20 + hour % 4, hour * 6, 0, type="actuator",
+                                   component_type="Zone Temperature Control",
+                                   control_type="Heating Setpoint",
+                                   actuator_key=zone,
+                                   end_time=hour * 6 + 6)
+
+start = time.perf_counter()
+for _ in range(steps):
+    model._step_callback()
+elapsed = time.perf_counter() - start
+print(f"{'Step callback':<25} {elapsed / steps * 1e6:10.2f} us/step {elapsed:10.2f} s/year")
+model.close()
@@ -0,0 +1,252 @@
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import numpy as np
+from eppy import iddgaps
+from eppy.EPlusInterfaceFunctions.eplusdata import Eplusdata
+from eppy.EPlusInterfaceFunctions.structures import CaseInsensitiveDict
+from eppy.bunch_subclass import EpBunch
+from eppy.bunchhelpers import makefieldname
+from eppy.idf_msequence import Idf_MSequence
+from eppy.idfreader import makeabunch
+from eppy.modeleditor import IDF
+
+cache_folder = os.environ.get("COBS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "cobs"))
+
+_actuator_catalogs = dict()
+_idd_hashes = dict()
+_field_names = dict()
+
+ACTUATOR_FIELDS = ("component_type", "control_type", "actuator_key")
+
+
+def set_cache_folder(path):
+    """
+    Change the folder that stores all cached artifacts. The default is ~/.cache/cobs or the COBS_CACHE environment variable.
+
+    :parameter path: The path to the cache folder.
+
+    :return: None
+    """
+    global cache_folder
+    cache_folder = path
+
+
+def get_cache_path(category, key, extension):
+    """
+    Find the path of a cached artifact, and create the folder of its category if needed.
+
+    :parameter category: The type of the artifact, e.g. "edd".
+
+    :parameter key: The content hash of the artifact.
+
+    :parameter extension: The file extension of the artifact.
+
+    :return: The path to the artifact.
+    """
+    folder = os.path.join(cache_folder, category)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{key}.{extension}")
+
+
+def hash_content(*parts):
+    """
+    Compute the content hash of all given parts.
+
+    :parameter parts: Strings or bytes that identify the artifact.
+
+    :return: The hex digest of the hash.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    """
+    Write the file through a temporary file, so concurrent processes never read a partially written cache.
+
+    :parameter path: The path to the file.
+
+    :parameter data: The bytes to write.
+
+    :return: None
+    """
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(descriptor, 'wb') as temporary_file:
+        temporary_file.write(data)
+    os.replace(temporary_path, path)
+
+
+def get_idd_hash():
+    """
+    Compute the content hash of the IDD file set by ``IDF.setiddname``. The hash identifies the IDD version.
+
+    :return: The hex digest of the hash.
+    """
+    if IDF.iddname not in _idd_hashes:
+        with open(IDF.iddname, 'rb') as idd_file:
+            _idd_hashes[IDF.iddname] = hash_content(idd_file.read())
+    return _idd_hashes[IDF.iddname]
+
+
+def load_idd():
+    """
+    Make sure the IDD file is loaded. The parsed IDD schema is cached in a binary format keyed by the hash of the IDD
+    file, so only the first process that uses an IDD file pays the parsing cost.
+
+    :return: None
+    """
+    if IDF.idd_info is not None:
+        return
+    cache_path = get_cache_path("idd", get_idd_hash(), "pickle")
+    if os.path.isfile(cache_path):
+        with open(cache_path, 'rb') as cache_file:
+            block, idd_info, idd_index, idd_version = pickle.load(cache_file)
+        IDF.setidd(idd_info, idd_index, block, idd_version)
+    else:
+        IDF(io.StringIO(""))
+        write_atomic(cache_path, pickle.dumps((IDF.block, IDF.idd_info, IDF.idd_index, IDF.idd_version),
+                                              protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def load_idf(path):
+    """
+    Load the IDF file. The field values of all components are cached in a binary format keyed by the hash of the file
+    content and the IDD file, so the following loads of the same file skip the text parsing. The components are
+    rebuilt against the IDD loaded by ``load_idd``, so the IDD is not stored in every cached file, and share the field
+    names of their type, which are only computed once in each process.
+
+    :parameter path: The path to the IDF file.
+
+    :return: The eppy ``IDF`` object.
+    """
+    with open(path, 'rb') as idf_file:
+        key = hash_content(idf_file.read(), get_idd_hash())
+    cache_path = get_cache_path("idfdata", key, "pickle")
+    load_idd()
+    if os.path.isfile(cache_path):
+        with open(cache_path, 'rb') as cache_file:
+            objects, object_types = pickle.load(cache_file)
+        return _build_idf(path, objects, object_types)
+    idf = IDF(path)
+    objects = {key: fields for key, fields in idf.model.dt.items() if fields}
+    write_atomic(cache_path, pickle.dumps((objects, idf.model.dtls), protocol=pickle.HIGHEST_PROTOCOL))
+    return idf
+
+
+def _build_idf(path, objects, object_types):
+    """
+    Rebuild the eppy ``IDF`` object from the cached field values, the same as ``IDF(path)`` without the parsing.
+
+    :parameter path: The path to the IDF file.
+
+    :parameter objects: A dictionary maps the upper case type to the field value lists of the components.
+
+    :parameter object_types: The upper case types in the order of the IDD.
+
+    :return: The eppy ``IDF`` object.
+    """
+    data = Eplusdata()
+    data.dt = {key: objects.get(key, list()) for key in object_types}
+    data.dtls = object_types
+    # Name the fields of the extensible types in the IDD, as done when the IDF is parsed
+    skiplist = ["TABLE:MULTIVARIABLELOOKUP"] if tuple(IDF.idd_version) < (8,) else None
+    nofirstfields = iddgaps.missingkeys_standard(IDF.idd_info, object_types, skiplist=skiplist)
+    iddgaps.missingkeys_nonstandard(IDF.block, IDF.idd_info, object_types, nofirstfields)
+    idf = IDF()
+    idf.idfname = path
+    idf.idfabsname = os.path.abspath(path)
+    idf.model = data
+    idf.idfobjects = CaseInsensitiveDict()
+    for obj_i, key in enumerate(object_types):
+        fields = data.dt[key]
+        components = list()
+        for obj in fields:
+            field_names = _get_field_names(obj_i)
+            if len(obj) > len(field_names):
+                # The IDD has fewer extensible fields than the component, let eppy extend the IDD
+                component = makeabunch(IDF.idd_info, obj, obj_i, block=IDF.block)
+            else:
+                component = EpBunch(obj, list(field_names), IDF.idd_info[obj_i])
+            components.append(component)
+        idf.idfobjects[key] = Idf_MSequence(components, fields, idf)
+    return idf
+
+
+def _get_field_names(obj_i):
+    """
+    Get the field names of a type in the IDD, the same as the names eppy gives to the fields of a parsed component.
+
+    :parameter obj_i: The position of the type in the IDD.
+
+    :return: List of the field names.
+    """
+    objidd = IDF.idd_info[obj_i]
+    field_names = _field_names.get((IDF.iddname, obj_i))
+    # The IDD of a type grows when a component has more extensible fields than the IDD
+    if field_names is None or len(field_names) != len(objidd):
+        field_names = ["key"] + [makefieldname(field.get("field")[0]) for field in objidd[1:]]
+        _field_names[(IDF.iddname, obj_i)] = field_names
+    return field_names
+
+
+def load_actuator_catalog(key):
+    """
+    Find the actuators of a building in the catalog.
+
+    :parameter key: The content hash of the building.
+
+    :return: A numpy structured array of (component_type, control_type, actuator_key), or None if the building is not in the catalog.
+    """
+    actuators = _actuator_catalogs.get(key)
+    if actuators is None:
+        path = get_cache_path("edd", key, "npy")
+        if not os.path.isfile(path):
+            return None
+        actuators = np.load(path)
+        _actuator_catalogs[key] = actuators
+    return actuators
+
+
+def save_actuator_catalog(key, actuators):
+    """
+    Add the actuators of a building to the catalog.
+
+    :parameter key: The content hash of the building.
+
+    :parameter actuators: List of tuples of (component_type, control_type, actuator_key).
+
+    :return: A numpy structured array of (component_type, control_type, actuator_key).
+    """
+    width = max((len(field) for actuator in actuators for field in actuator), default=1)
+    actuators = np.array(actuators, dtype=[(field, f"U{width}") for field in ACTUATOR_FIELDS])
+    buffer = io.BytesIO()
+    np.save(buffer, actuators)
+    write_atomic(get_cache_path("edd", key, "npy"), buffer.getvalue())
+    _actuator_catalogs[key] = actuators
+    return actuators
+
+
+def parse_edd(path):
+    """
+    Read the actuators reported in the EDD file.
+
+    :parameter path: The path to the eplusout.edd file.
+
+    :return: List of tuples of (component_type, control_type, actuator_key).
+    """
+    actuators = list()
+    with open(path, 'r') as edd:
+        for line in edd:
+            if not line.startswith("EnergyManagementSystem:Actuator Available"):
+                continue
+            line = line.strip().split(',')
+            actuators.append((line[2], line[3], line[1]))
+    return actuators
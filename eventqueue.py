@@ -1,16 +1,140 @@
+import heapq
+import numpy as np
+from itertools import count
+
+
+class Timeline:
+    """
+    The scheduled events of one control target, stored as time intervals instead of one entry per timestep.
+    """
+
+    def __init__(self, compact=False):
+        """
+        events: list
+            [start_time, end_time, priority, order, value, note] of all scheduled intervals, only kept without compact
+        pending: heap
+            (start_time, order, event) of the intervals that have not started yet
+        active: heap
+            (priority, order, event) of the intervals that have started, ended intervals are removed lazily
+        size: int
+            Number of intervals held by the timeline
+
+        :parameter compact: Set to True to free the intervals once they are passed by ``resolve``.
+        """
+        self.compact = compact
+        self.events = None if compact else list()
+        self.pending = list()
+        self.active = list()
+        self.active_limit = 16
+        self.time = -1
+        self.size = 0
+
+    def insert(self, start_time, end_time, priority, order, value, note):
+        """
+        Add an interval in O(log n).
+
+        :return: None
+        """
+        event = [start_time, end_time, priority, order, value, note]
+        if not self.compact:
+            self.events.append(event)
+        heapq.heappush(self.pending, (start_time, order, event))
+        self.size += 1
+
+    def resolve(self, time):
+        """
+        Find the winning event at the given time. Time should not go backward between two calls, otherwise the
+        events are searched from all intervals.
+
+        :return: The winning event, or None if no interval covers the time.
+        """
+        if time < self.time:
+            return self.query(time)
+        self.time = time
+        while self.pending and self.pending[0][0] <= time:
+            event = heapq.heappop(self.pending)[2]
+            heapq.heappush(self.active, (event[2], event[3], event))
+        while self.active and self.active[0][2][1] <= time:
+            heapq.heappop(self.active)
+            if self.compact:
+                self.size -= 1
+        if self.compact and len(self.active) > self.active_limit:
+            # Ended intervals below the winner are only popped once they reach the top, drop them all at once
+            self.active = [item for item in self.active if item[2][1] > time]
+            heapq.heapify(self.active)
+            self.size = len(self.pending) + len(self.active)
+            self.active_limit = max(16, 2 * len(self.active))
+        if self.active:
+            return self.active[0][2]
+        return None
+
+    def query(self, time):
+        """
+        Find the winning event at any given time by searching all intervals. With compact, the intervals that are
+        already passed by ``resolve`` are not found.
+
+        :return: The winning event, or None if no interval covers the time.
+        """
+        if self.compact:
+            events = [item[2] for item in self.pending + self.active]
+        else:
+            events = self.events
+        winner = None
+        for event in events:
+            if event[0] <= time < event[1] and (winner is None or (event[2], event[3]) < (winner[2], winner[3])):
+                winner = event
+        return winner
+
+    def is_done(self):
+        """
+        :return: True if all intervals have been passed by ``resolve``.
+        """
+        return not self.pending and not self.active
+
+
 class EventQueue:
-    def __init__(self):
+    def __init__(self, compact: bool = False, max_keys: int = None):
         """
+        keys: list
+            The control targets registered in the queue, the position is the key of the target
+            ("actuator", (component_type, control_type, actuator_key)) or ("global", var_name)
+        key_index: dict
+            (type, target) -> key
         queue: dict
-            time -> dict
-                    {
-                        actuator -> {component|*|ctrl|*|key -> [priority, value]}
-                        global -> {var_name -> [priority, value]}
-                    }
+            key -> Timeline
+        live: dict
+            key -> Timeline that still has intervals to resolve
+        live_entries: int
+            Number of intervals held by the queue
+        peak_entries: int
+            The maximum of live_entries since the queue is created
+
+        :parameter compact: Set to True to free the events older than the lockdown as the simulation advances. The
+        events in the past can no longer be found by ``get_event``.
+
+        :parameter max_keys: The maximum number of control targets that can be registered, e.g. the slots of the shared memory. None for no limit.
         """
+        self.compact = compact
+        self.max_keys = max_keys
+        self.keys = list()
+        self.key_index = dict()
         self.queue = dict()
         self.extra_events = dict()
+        self.live = dict()
+        self.order = count()
         self.lockdown = -1
+        self.live_entries = 0
+        self.peak_entries = 0
+
+    def _insert(self, timelines, key, start_time, end_time, priority, value, note):
+        timeline = timelines.get(key)
+        if timeline is None:
+            timeline = Timeline(self.compact)
+            timelines[key] = timeline
+        timeline.insert(start_time, end_time, priority, next(self.order), value, note)
+        self.live_entries += 1
+        self.peak_entries = max(self.peak_entries, self.live_entries)
+        return timeline
 
     def add_extra_events(self,
                          value_name: str,
@@ -21,13 +145,54 @@ class EventQueue:
                          note: str = None):
         if end_time is None:
             end_time = start_time + 1
-        for time in range(start_time, end_time):
-            if time < self.lockdown:
-                continue
-            self.extra_events[time] = self.queue.get(time, dict())
-            previous = self.extra_events[time].get(value_name, None)
-            if previous is None or previous[0] > priority:
-                self.extra_events[time][value_name] = [priority, value, note]
+        start_time = max(start_time, self.lockdown)
+        if start_time >= end_time:
+            return
+        self._insert(self.extra_events, value_name, start_time, end_time, priority, value, note)
+
+    def register_key(self,
+                     type: str = "actuator",
+                     dict_target: dict = None,
+                     component_type: str = None,
+                     control_type: str = None,
+                     actuator_key: str = None,
+                     var_name: str = None):
+        """
+        Register a control target. Registering the same target again returns the same key.
+
+        :parameter type: Either "actuator" or "global".
+
+        :parameter dict_target: The actuator in the format of ``Model.get_possible_actions()``.
+
+        :parameter component_type: The component type of the actuator, if dict_target is not given.
+
+        :parameter control_type: The control type of the actuator, if dict_target is not given.
+
+        :parameter actuator_key: The actuator key of the actuator, if dict_target is not given.
+
+        :parameter var_name: The name of the global variable.
+
+        :return: The integer key of the control target.
+        """
+        if type == "actuator":
+            if dict_target is not None:
+                target = ("actuator", (dict_target["Component Type"],
+                                       dict_target["Control Type"],
+                                       dict_target["Actuator Key"]))
+            else:
+                target = ("actuator", (component_type, control_type, actuator_key))
+        elif type == "global":
+            target = ("global", var_name)
+        else:
+            raise ValueError("Invalud control input")
+        key = self.key_index.get(target)
+        if key is None:
+            if self.max_keys is not None and len(self.keys) >= self.max_keys:
+                raise ValueError(f"More than {self.max_keys} control targets, increase max_actions")
+            key = len(self.keys)
+            self.keys.append(target)
+            self.key_index[target] = key
+        return key
 
     def schedule_event(self,
                        value,
@@ -41,36 +206,122 @@ class EventQueue:
                        actuator_key: str = None,
                        var_name: str = None,
                        end_time: int = None,
-                       note: str = None):
-
-        control_str = ""
-        if type == "actuator":
-            if dict_target is not None:
-                control_str = "|*|".join([dict_target["Component Type"],
-                                          dict_target["Control Type"],
-                                          dict_target["Actuator Key"]])
-            else:
-                control_str = "|*|".join([component_type, control_type, actuator_key])
-        elif type == "global":
-            control_str = var_name
-        else:
-            raise ValueError("Invalud control input")
+                       note: str = None,
+                       key: int = None):
+        """
+        Schedule an event on a control target. The target is given by the key returned by ``register_key``, or by
+        the same arguments as ``register_key``.
+        """
+        if key is None:
+            key = self.register_key(type, dict_target, component_type, control_type, actuator_key, var_name)
+        elif not 0 <= key < len(self.keys):
+            raise ValueError("Unknown control key, register the control target with register_key first")
 
         if end_time is None:
             end_time = start_time + 1
-        for time in range(start_time, end_time):
-            if time < self.lockdown:
-                continue
-            self.queue[time] = self.queue.get(time, {"actuator": dict(), "global": dict()})
-            previous = self.queue[time][type].get(control_str, None)
-            if previous is None or previous[0] > priority:
-                self.queue[time][type][control_str] = [priority, value, note]
+        start_time = max(start_time, self.lockdown)
+        if start_time >= end_time:
+            return
+        self.live[key] = self._insert(self.queue, key, start_time, end_time, priority, value, note)
+
+    def schedule_events(self,
+                        keys,
+                        values,
+                        start_times,
+                        end_times=None,
+                        priorities=0,
+                        notes=None):
+        """
+        Schedule many events in one pass. The arguments are arrays of the same length, or scalars shared by all events.
+
+        :parameter keys: The indices of the control targets returned by ``register_key``.
+
+        :parameter values: The values to set.
+
+        :parameter start_times: The first timestep of the events.
+
+        :parameter end_times: The timestep after the last timestep of the events. Default is one timestep after the start.
+
+        :parameter priorities: The priorities of the events, lower with higher priority.
+
+        :parameter notes: A list of notes of the events, or None.
+
+        :return: Number of events scheduled.
+        """
+        keys = np.asarray(keys, dtype=np.intp)
+        if keys.size and (keys.min() < 0 or keys.max() >= len(self.keys)):
+            raise ValueError("Unknown control key, register the control target with register_key first")
+        shape = keys.shape
+        start_times = np.broadcast_to(np.asarray(start_times, dtype=np.int64), shape)
+        if end_times is None:
+            end_times = start_times + 1
+        else:
+            end_times = np.broadcast_to(np.asarray(end_times, dtype=np.int64), shape)
+        start_times = np.maximum(start_times, self.lockdown)
+        selected = np.flatnonzero(start_times < end_times)
+        values = np.broadcast_to(np.asarray(values), shape)[selected].tolist()
+        priorities = np.broadcast_to(np.asarray(priorities), shape)[selected].tolist()
+        if notes is None:
+            notes = [None] * len(selected)
+        else:
+            notes = [notes[i] for i in selected.tolist()]
+        timelines = dict()
+        for key, value, start_time, end_time, priority, note in zip(keys[selected].tolist(), values,
+                                                                    start_times[selected].tolist(),
+                                                                    end_times[selected].tolist(),
+                                                                    priorities, notes):
+            timeline = timelines.get(key)
+            if timeline is None:
+                timeline = self.queue.get(key)
+                if timeline is None:
+                    timeline = Timeline(self.compact)
+                    self.queue[key] = timeline
+                self.live[key] = timeline
+                timelines[key] = timeline
+            timeline.insert(start_time, end_time, priority, next(self.order), value, note)
+        self.live_entries += len(selected)
+        self.peak_entries = max(self.peak_entries, self.live_entries)
+        return len(selected)
 
     def get_event(self,
                   time: int):
-        return self.queue.get(time, {"actuator": dict(), "global": dict()})
+        events = {"actuator": dict(), "global": dict()}
+        for key, timeline in self.queue.items():
+            event = timeline.query(time)
+            if event is not None:
+                events[self.keys[key][0]][key] = [event[2], event[4], event[5]]
+        return events
 
     def trigger(self,
                 current_time: int):
+        """
+        Resolve the winning events of all control targets at the current timestep.
+
+        :return: {"actuator": {key -> [priority, value, note]}, "global": {key -> [priority, value, note]}}
+        """
         self.lockdown = current_time
-        return self.get_event(current_time)
+        events = {"actuator": dict(), "global": dict()}
+        finished = list()
+        for key, timeline in self.live.items():
+            size = timeline.size
+            event = timeline.resolve(current_time)
+            self.live_entries -= size - timeline.size
+            if event is not None:
+                events[self.keys[key][0]][key] = [event[2], event[4], event[5]]
+            elif timeline.is_done():
+                finished.append(key)
+        for key in finished:
+            del self.live[key]
+            if self.compact:
+                del self.queue[key]
+        # The extra events are not applied, but they are resolved as well so the passed intervals are freed
+        finished = list()
+        for value_name, timeline in self.extra_events.items():
+            size = timeline.size
+            if timeline.resolve(current_time) is None and timeline.is_done():
+                finished.append(value_name)
+            self.live_entries -= size - timeline.size
+        if self.compact:
+            for value_name in finished:
+                del self.extra_events[value_name]
+        return events
@@ -1,11 +1,18 @@
 import sys
 
+from cache import hash_content, load_actuator_catalog, load_idf, parse_edd, save_actuator_catalog
 from eventqueue import EventQueue
+from observation import ObservationSpec, State
+from transport import PipeTransport, SharedMemoryTransport
 from eppy.modeleditor import IDF
-from eppy.bunch_subclass import BadEPFieldError
+from eppy.bunch_subclass import BadEPFieldError, EpBunch
 # from pyenergyplus.api import EnergyPlusAPI
-from multiprocessing import Event, Pipe, Process
+from multiprocessing import Process
 import os
+import pickle
+import shutil
+import tempfile
+import weakref
 
 
 class Agent:
@@ -17,16 +24,135 @@ class Agent:
         pass
 
 
+class HandleRegistry:
+    """
+    Cache of the EnergyPlus exchange handles. Each handle is resolved once through the string-keyed lookup of the
+    EnergyPlus API, and reused for the rest of the run.
+    """
+
+    def __init__(self, exchange):
+        """
+        :parameter exchange: The ``api.exchange`` object of the running EnergyPlus instance.
+        """
+        self.exchange = exchange
+        self.variables = dict()
+        self.meters = dict()
+        self.actuators = dict()
+        self.globals = dict()
+        self.controls = dict()
+
+    def variable(self, variable_name, key):
+        """
+        Get the handle of an output variable.
+
+        :parameter variable_name: The name of the output variable, e.g. "Zone Air Temperature".
+
+        :parameter key: The key of the output variable, usually the zone name.
+
+        :return: The variable handle.
+        """
+        handle = self.variables.get((variable_name, key))
+        if handle is None:
+            handle = self.exchange.get_variable_handle(variable_name, key)
+            self.variables[(variable_name, key)] = handle
+        return handle
+
+    def meter(self, meter_name):
+        """
+        Get the handle of a meter.
+
+        :parameter meter_name: The name of the meter, e.g. "Heating:EnergyTransfer".
+
+        :return: The meter handle.
+        """
+        handle = self.meters.get(meter_name)
+        if handle is None:
+            handle = self.exchange.get_meter_handle(meter_name)
+            self.meters[meter_name] = handle
+        return handle
+
+    def actuator(self, component_type, control_type, actuator_key):
+        """
+        Get the handle of an actuator. The cache is filled lazily when the actuator is used for the first time.
+
+        :parameter component_type: The component type of the actuator.
+
+        :parameter control_type: The control type of the actuator.
+
+        :parameter actuator_key: The actuator key of the actuator.
+
+        :return: The actuator handle.
+        """
+        handle = self.actuators.get((component_type, control_type, actuator_key))
+        if handle is None:
+            handle = self.exchange.get_actuator_handle(component_type, control_type, actuator_key)
+            self.actuators[(component_type, control_type, actuator_key)] = handle
+        return handle
+
+    def internal_variable(self, variable_type, key):
+        """
+        Get the handle of an EMS internal variable.
+
+        :parameter variable_type: The type of the internal variable, e.g. "Zone Floor Area".
+
+        :parameter key: The key of the internal variable, usually the zone name.
+
+        :return: The internal variable handle.
+        """
+        handle = self.variables.get((variable_type, key, "internal"))
+        if handle is None:
+            handle = self.exchange.get_internal_variable_handle(variable_type, key)
+            self.variables[(variable_type, key, "internal")] = handle
+        return handle
+
+    def global_variable(self, var_name):
+        """
+        Get the handle of an EMS global variable. The cache is filled lazily when the variable is used for the first time.
+
+        :parameter var_name: The name of the EMS global variable.
+
+        :return: The global variable handle.
+        """
+        handle = self.globals.get(var_name)
+        if handle is None:
+            handle = self.exchange.get_global_handle(var_name)
+            self.globals[var_name] = handle
+        return handle
+
+    def control(self, key, target):
+        """
+        Get the handle of a control target registered in the ``EventQueue``. The handle is attached to the integer key,
+        so the per-step lookup does not touch the target names.
+
+        :parameter key: The key of the control target.
+
+        :parameter target: The control target of the key, ("actuator", (component_type, control_type, actuator_key)) or ("global", var_name).
+
+        :return: The actuator handle or the global variable handle.
+        """
+        handle = self.controls.get(key)
+        if handle is None:
+            type, name = target
+            if type == "actuator":
+                handle = self.actuator(*name)
+            else:
+                handle = self.global_variable(name)
+            self.controls[key] = handle
+        return handle
+
+
 class Model:
     """
     The environment class.
     """
     model_import_flag = False
+    energyplus_folder = None
 
     @classmethod
     def set_energyplus_folder(cls, path):
         """
-        Add the pyenergyplus into the path so the program can find the EnergyPlus.
+        Add the pyenergyplus into the path so the program can find the EnergyPlus. The IDD file is not parsed until the
+        first building is loaded, and the parsed IDD is cached for the following processes.
 
         :parameter path: The installation path of the EnergyPlus 9.3.0.
         :type path: str
@@ -35,6 +161,7 @@ class Model:
         """
         sys.path.insert(0, path)
         IDF.setiddname(f"{path}Energy+.idd")
+        cls.energyplus_folder = path
         cls.model_import_flag = True
 
     def __init__(self,
@@ -44,7 +171,12 @@ class Model:
                  weather_file: str = None,
                  heating_type: str = None,
                  foundation_type: str = None,
-                 agent: Agent = None
+                 agent: Agent = None,
+                 observation_spec: ObservationSpec = None,
+                 shared_memory: bool = False,
+                 max_actions: int = 256,
+                 run_directory: str = None,
+                 run_root: str = None
                  ):
         """
         Initialize the building by loading the IDF file to the model.
@@ -62,25 +194,45 @@ class Model:
         :parameter foundation_type: Select one from "crawspace", "heated", "slab", and "unheated"
         
         :parameter agent: The user-defined Agent class object if the agent is implemented in a class.
+
+        :parameter observation_spec: The ``ObservationSpec`` declares the values in the state. If None, the state contains the temperature of all zones, the heating energy, and the PMV of all zones with thermal comfort model if it is requested.
+
+        :parameter shared_memory: Set to True to exchange the state and action vectors with the EnergyPlus process through shared memory instead of a pipe.
+
+        :parameter max_actions: The maximum number of distinct actuators and global variables used in one simulation with the shared memory.
+
+        :parameter run_directory: The folder that holds the input IDF and the output files of this model. If None, a temporary folder is created under run_root and removed by ``close``.
+
+        :parameter run_root: The folder to create the temporary run directory. Default is the system temporary folder. Use a tmpfs location such as /dev/shm to keep the EnergyPlus output in memory.
         """
         if not Model.model_import_flag:
             raise ImportError("You have to set the energyplus folder first")
         self.api = None
+        self.handles = None
         self.current_state = dict()
         self.idf = None
         self.run_parameters = None
-        self.queue = EventQueue()
+        self.queue = EventQueue(compact=True)
         self.agent = agent
         self.ignore_list = set()
+        self.name_fields = dict()
+        self.name_index = dict()
+        self.index_sizes = dict()
+        self.field_indices = dict()
         self.zone_names = None
         self.thermal_names = None
+        self.output_variables = frozenset()
+        self.observation_spec = observation_spec
+        self.default_observation = observation_spec is None
+        self.state_buffer = None
         self.counter = 0
         self.historical_values = list()
+        self.applied_values = {"actuator": dict(), "global": dict()}
         self.warmup_complete = False
         self.terminate = False
-        self.wait_for_step = Event()
-        self.wait_for_state = Event()
-        self.parent, self.child_energy = Pipe(duplex=True)
+        self.shared_memory = shared_memory
+        self.max_actions = max_actions
+        self.transport = None
         self.child = None
         self.use_lock = False
 
@@ -91,12 +243,23 @@ class Model:
             if weather_file is None:
                 weather_file = f"./weathers/{climate_zone}.epw"
 
-        self.run_parameters = ["-d", "result", "input.idf"]
+        if run_directory is None:
+            self.run_directory = tempfile.mkdtemp(prefix="cobs_", dir=run_root)
+            self.temporary_run_directory = True
+            weakref.finalize(self, shutil.rmtree, self.run_directory, ignore_errors=True)
+        else:
+            self.run_directory = os.path.abspath(run_directory)
+            self.temporary_run_directory = False
+            os.makedirs(self.run_directory, exist_ok=True)
+        self.input_idf_path = os.path.join(self.run_directory, "input.idf")
+        self.output_directory = os.path.join(self.run_directory, "result")
+
+        self.run_parameters = ["-d", self.output_directory, self.input_idf_path]
         if weather_file:
-            self.run_parameters = ["-w", weather_file] + self.run_parameters
+            self.run_parameters = ["-w", os.path.abspath(weather_file)] + self.run_parameters
 
         try:
-            self.idf = IDF(idf_file_name)
+            self.idf = load_idf(idf_file_name)
         except:
             raise ValueError("IDF file is damaged or not match with your EnergyPlus version.")
 
@@ -150,14 +313,95 @@ class Model:
 
         :return: List of names.
         """
-        available_names = self.get_sub_configuration(idf_header_name)
-        if "Name" in available_names:
-            return [entry["Name"] for entry in self.idf.idfobjects[idf_header_name]]
-        else:
-            for field_name in available_names:
-                if "name" in field_name.lower():
-                    return [entry[field_name] for entry in self.idf.idfobjects[idf_header_name]]
-            raise KeyError(f"No entry field available for {idf_header_name}")
+        field_name = self._get_name_field(idf_header_name)
+        return [entry[field_name] for entry in self.idf.idfobjects[idf_header_name]]
+
+    def _get_name_field(self,
+                        idf_header_name: str):
+        """
+        Find the field that is used as the entry of the given type of components.
+
+        :parameter idf_header_name: The type of the component.
+
+        :return: The field name.
+        """
+        field_name = self.name_fields.get(idf_header_name.upper())
+        if field_name is None:
+            available_names = self.get_sub_configuration(idf_header_name)
+            if "Name" in available_names:
+                field_name = "Name"
+            else:
+                for name in available_names:
+                    if "name" in name.lower():
+                        field_name = name
+                        break
+                else:
+                    raise KeyError(f"No entry field available for {idf_header_name}")
+            self.name_fields[idf_header_name.upper()] = field_name
+        return field_name
+
+    def _get_name_index(self,
+                        idf_header_name: str,
+                        rebuild: bool = False):
+        """
+        Get the index that maps the entry to the components of the given type. The index is built at the first lookup,
+        and kept in sync by ``add_configuration``, ``delete_configuration`` and ``edit_configuration``. It is rebuilt
+        when the number of components no longer matches, which means the list is changed on the IDF directly.
+
+        :parameter idf_header_name: The type of the component.
+
+        :parameter rebuild: Set to True to rebuild the index from the building model.
+
+        :return: A dictionary maps the entry to the list of components with that entry, in the order of the IDF.
+        """
+        index = self.name_index.get(idf_header_name.upper())
+        entries = self.idf.idfobjects[idf_header_name]
+        if index is None or rebuild or self.index_sizes[idf_header_name.upper()] != len(entries):
+            field_name = self._get_name_field(idf_header_name)
+            index = dict()
+            for entry in entries:
+                index.setdefault(entry[field_name], list()).append(entry)
+            self.name_index[idf_header_name.upper()] = index
+            self.index_sizes[idf_header_name.upper()] = len(entries)
+        return index
+
+    def _locate_configuration(self,
+                              idf_header_name: str,
+                              component_name: str):
+        """
+        Find the component by its entry through the index.
+
+        :parameter idf_header_name: The type of the component.
+
+        :parameter component_name: The entry of the component.
+
+        :return: The first component with that entry.
+        """
+        entries = self._get_name_index(idf_header_name).get(component_name)
+        if not entries or not self._is_indexed_entry(idf_header_name, component_name, entries[0]):
+            # The component may be added, renamed or removed on the IDF directly, refresh the index once
+            entries = self._get_name_index(idf_header_name, rebuild=True).get(component_name)
+            if not entries:
+                raise KeyError(f"Failed to locate {component_name} in {idf_header_name}")
+        return entries[0]
+
+    def _is_indexed_entry(self,
+                          idf_header_name: str,
+                          component_name: str,
+                          entry):
+        """
+        Check that a component found in the index still has the entry. Removing the component from the building
+        model directly is caught by the size check in ``_get_name_index``.
+
+        :parameter idf_header_name: The type of the component.
+
+        :parameter component_name: The entry of the component in the index.
+
+        :parameter entry: The component.
+
+        :return: True if the index is up to date for the component.
+        """
+        return entry[self._get_name_field(idf_header_name)] == component_name
 
     def get_configuration(self,
                           idf_header_name: str,
@@ -174,11 +418,7 @@ class Model:
         if component_name is None:
             return self.idf.idfobjects[idf_header_name]
         else:
-            names = self.get_available_names_under_group(idf_header_name)
-            if component_name in names:
-                return self.idf.idfobjects[idf_header_name][names.index(component_name)]
-            else:
-                raise KeyError(f"Failed to locate {component_name} in {idf_header_name}")
+            return self._locate_configuration(idf_header_name, component_name)
 
     def get_value_range(self,
                         idf_header_name: str,
@@ -203,6 +443,68 @@ class Model:
         else:
             return self.idf.idfobjects[idf_header_name][0].getrange(field_name)
 
+    def _get_field_indices(self,
+                           entry):
+        """
+        Get the positions of the setting entries of a type of component. The positions are cached per type of
+        component, and the user given entries are added to the cache once they are normalized.
+
+        :parameter entry: A component of the type.
+
+        :return: A dictionary maps the setting entry to its position in the field values.
+        """
+        header = entry.key.upper()
+        field_indices = self.field_indices.get(header)
+        if field_indices is None:
+            field_indices = {name: i for i, name in enumerate(entry.fieldnames)}
+            self.field_indices[header] = field_indices
+        return field_indices
+
+    @staticmethod
+    def _find_field(field_indices, key):
+        """
+        Find the position of a setting entry.
+
+        :parameter field_indices: The positions of the setting entries from ``_get_field_indices``.
+
+        :parameter key: The space or underline separated setting entry.
+
+        :return: The position of the setting entry, or None if it is not a declared field.
+        """
+        i = field_indices.get(key)
+        if i is None:
+            i = field_indices.get(Model.name_reformat(key))
+            if i is not None:
+                field_indices[key] = i
+        return i
+
+    def _set_fields(self,
+                    entry,
+                    values: dict):
+        """
+        Set the settings of a component. The position of each setting entry is cached per type of component, so the
+        entries are only normalized and validated once.
+
+        :parameter entry: The component.
+
+        :parameter values: A dictionary map the setting entry and the setting value.
+
+        :return: None
+        """
+        field_indices = self._get_field_indices(entry)
+        fieldvalues = entry.fieldvalues
+        for key, value in values.items():
+            if not isinstance(value, (int, float)):
+                value = str(value)
+            i = Model._find_field(field_indices, key)
+            if i is None:
+                # Not a declared field, let eppy resolve the alias or raise BadEPFieldError
+                setattr(entry, Model.name_reformat(key), value)
+                continue
+            if i >= len(fieldvalues):
+                fieldvalues.extend([""] * (i - len(fieldvalues) + 1))
+            fieldvalues[i] = value
+
     def add_configuration(self,
                           idf_header_name: str,
                           values: dict = None):
@@ -216,16 +518,47 @@ class Model:
         :return: The new component.
         """
         object = self.idf.newidfobject(idf_header_name.upper())
-        if values is None:
-            return object
-        for key, value in values.items():
-            key = Model.name_reformat(key)
-            if isinstance(value, (int, float)):
-                exec(f"object.{key} = {value}")
-            else:
-                exec(f"object.{key} = '{value}'")
+        if values is not None:
+            self._set_fields(object, values)
+        index = self.name_index.get(idf_header_name.upper())
+        if index is not None:
+            index.setdefault(object[self.name_fields[idf_header_name.upper()]], list()).append(object)
+            self.index_sizes[idf_header_name.upper()] += 1
         return object
 
+    def add_configurations(self,
+                           idf_header_name: str,
+                           values_list: list):
+        """
+        Create and add multiple new components of the same type into the building model.
+
+        :parameter idf_header_name: The type of the components.
+
+        :parameter values_list: A list of dictionaries map the setting entry and the setting value, one for each component.
+
+        :return: List of the new components.
+        """
+        objects = list()
+        template = None
+        index = self.name_index.get(idf_header_name.upper())
+        for values in values_list:
+            if template is None:
+                object = self.idf.newidfobject(idf_header_name.upper())
+                template = object
+                default_values = list(object.fieldvalues)
+            else:
+                # Copy the first component instead of building each one from the IDD, which is slow for the types
+                # with thousands of extensible fields such as Schedule:Compact
+                object = EpBunch(list(default_values), list(template.objls), template.objidd)
+                self.idf.idfobjects[idf_header_name.upper()].append(object)
+            if values is not None:
+                self._set_fields(object, values)
+            if index is not None:
+                index.setdefault(object[self.name_fields[idf_header_name.upper()]], list()).append(object)
+                self.index_sizes[idf_header_name.upper()] += 1
+            objects.append(object)
+        return objects
+
     def delete_configuration(self,
                              idf_header_name: str,
                              component_name: str = None):
@@ -243,19 +576,27 @@ class Model:
         if component_name is None:
             while len(self.idf.idfobjects[idf_header_name]):
                 self.idf.popidfobject(idf_header_name, 0)
+            self.name_index.pop(idf_header_name.upper(), None)
         else:
-            names = self.get_available_names_under_group(idf_header_name)
-            if component_name in names:
-                self.idf.popidfobject(idf_header_name, names.index(component_name))
+            target = self._locate_configuration(idf_header_name, component_name)
+            for i, entry in enumerate(self.idf.idfobjects[idf_header_name]):
+                if entry is target:
+                    self.idf.popidfobject(idf_header_name, i)
+                    break
             else:
                 raise KeyError(f"Failed to locate {component_name} in {idf_header_name}")
+            index = self.name_index[idf_header_name.upper()]
+            index[component_name].pop(0)
+            if not index[component_name]:
+                del index[component_name]
+            self.index_sizes[idf_header_name.upper()] -= 1
 
     def edit_configuration(self,
                            idf_header_name: str,
                            identifier: dict,
                            update_values: dict):
         """
-        Edit an existing component in the building model.
+        Edit the existing components in the building model that match all settings in the identifier.
         
         :parameter idf_header_name: The type of the component.
         
@@ -263,25 +604,77 @@ class Model:
         
         :parameter update_values: A dictionary map the setting entry and the setting value that needs to update.
         
-        :return: None.
+        :return: List of the edited components.
+        """
+        return self.edit_configurations(idf_header_name, [(identifier, update_values)])[0]
+
+    def edit_configurations(self,
+                            idf_header_name: str,
+                            edits: list):
+        """
+        Apply multiple edits to the components of the same type in one pass. All identifiers are matched against the
+        components before any update is applied, so an update never changes which components the other identifiers match.
+
+        :parameter idf_header_name: The type of the component.
+
+        :parameter edits: List of (identifier, update_values) pairs in the format of ``edit_configuration``. Setting entries in the identifier that are not available for the type are ignored.
+
+        :return: List of the lists of the edited components, one for each pair.
         """
         if not self.idf.idfobjects.get(idf_header_name):
             raise KeyError(f"No {idf_header_name} section in current IDF file")
-        fields = self.get_sub_configuration(idf_header_name)
-        for entry in self.idf.idfobjects[idf_header_name]:
-            valid = True
-            for key, value in identifier:
-                key = Model.name_reformat(key)
-                if key in fields:
-                    if entry[key] != value:
-                        valid = False
-            if valid:
-                for key, value in update_values:
-                    key = Model.name_reformat(key)
-                    if isinstance(value, (int, float)):
-                        exec(f"entry.{key} = {value}")
-                    else:
-                        exec(f"entry.{key} = '{value}'")
+        entries = self.idf.idfobjects[idf_header_name]
+        field_indices = self._get_field_indices(entries[0])
+
+        # Group the identifiers by the fields they compare, so each component is hashed once per group of fields
+        predicates = dict()
+        for n, (identifier, _) in enumerate(edits):
+            fields = sorted((i, value) for i, value in ((Model._find_field(field_indices, key), value)
+                                                        for key, value in identifier.items()) if i is not None)
+            positions = tuple(i for i, _ in fields)
+            values = tuple(value for _, value in fields)
+            predicates.setdefault(positions, dict()).setdefault(values, list()).append(n)
+
+        matches = [list() for _ in edits]
+        for entry in entries:
+            fieldvalues = entry.fieldvalues
+            size = len(fieldvalues)
+            for positions, targets in predicates.items():
+                for n in targets.get(tuple(fieldvalues[i] if i < size else "" for i in positions), ()):
+                    matches[n].append(entry)
+
+        index = self.name_index.get(idf_header_name.upper())
+        for (_, update_values), matched in zip(edits, matches):
+            for entry in matched:
+                if index is not None:
+                    old_name = entry[self.name_fields[idf_header_name.upper()]]
+                self._set_fields(entry, update_values)
+                if index is not None:
+                    self._reindex_configuration(index, entry, old_name,
+                                                entry[self.name_fields[idf_header_name.upper()]])
+        return matches
+
+    @staticmethod
+    def _reindex_configuration(index, entry, old_name, new_name):
+        """
+        Move the component in the name index after its entry is changed.
+
+        :parameter index: The name index of the type of the component.
+
+        :parameter entry: The component.
+
+        :parameter old_name: The entry of the component before the change.
+
+        :parameter new_name: The entry of the component after the change.
+
+        :return: None
+        """
+        if old_name == new_name:
+            return
+        index[old_name] = [other for other in index[old_name] if other is not entry]
+        if not index[old_name]:
+            del index[old_name]
+        index.setdefault(new_name, list()).append(entry)
 
     def _get_thermal_names(self):
         """
@@ -317,8 +710,19 @@ class Model:
         """
         if not self.api.exchange.api_data_fully_ready():
             return
+        self._resolve_handles()
         self.warmup_complete = True
 
+    def _resolve_handles(self):
+        """
+        Resolve the handles of all state values once the EnergyPlus data is ready, so the step callback only needs to read values.
+
+        :return: None
+        """
+        if self.handles is None:
+            self.handles = HandleRegistry(self.api.exchange)
+        self.observation_spec.resolve(self.handles)
+
     def _generate_output_files(self):
         """
         Assert errors to terminate the simulation after the warmup in order to generate the EDD file to list all available actions for the current building.
@@ -335,52 +739,33 @@ class Model:
         """
         if not self.api.exchange.api_data_fully_ready() or not self.warmup_complete:
             return
-        current_state = dict()
+        exchange = self.api.exchange
         # print("Child: Simulating")
-        current_state["temperature"] = dict()
-        current_state["occupancy"] = dict()
-        for name in self.zone_names:
-            handle = self.api.exchange.get_variable_handle("Zone Air Temperature", name)
-            current_state["temperature"][name] = self.api.exchange.get_variable_value(handle)
-        handle = self.api.exchange.get_meter_handle("Heating:EnergyTransfer")
-        current_state["energy"] = self.api.exchange.get_meter_value(handle)
-
-        if "Zone Thermal Comfort Fanger Model PMV" in self.get_available_names_under_group("Output:Variable"):
-            current_state["PMV"] = dict()
-            for zone in self.thermal_names:
-                handle = self.api.exchange.get_variable_handle("Zone Thermal Comfort Fanger Model PMV", zone)
-                current_state["PMV"][zone] = self.api.exchange.get_variable_value(handle)
+        self.observation_spec.read(self.state_buffer)
 
         if self.use_lock:
             # print("Child: Sending current states")
-            self.child_energy.send(current_state)
-            self.wait_for_state.set()
-            # Take all actions
-            self.wait_for_step.clear()
+            self.transport.send_state(self.state_buffer)
             # print("Child: Waiting for actions")
-            if not self.child_energy.poll():
-                self.wait_for_step.wait()
-            # print("Child: Receiving actions")
-            events = self.child_energy.recv()
+            events = self.transport.recv_actions()
+            if events is None:
+                # The Model has stopped the simulation, let EnergyPlus finish without waiting
+                return
+            keys = self.transport.keys
         else:
-            self.current_state = current_state
+            self.current_state = self._wrap_state(self.state_buffer.copy())
             self.historical_values.append(self.current_state)
-            events = self.queue.trigger(self.counter)
+            events = self._get_changed_events(self.queue.trigger(self.counter))
+            keys = self.queue.keys
             self.counter += 1
 
         # print("Child: executing actions")
 
         # Trigger events
-        for key in events["actuator"]:
-            component_type, control_type, actuator_key = key.split("|*|")
-            value = events["actuator"][key][1]
-            handle = self.api.exchange.get_actuator_handle(component_type, control_type, actuator_key)
-            self.api.exchange.set_actuator_value(handle, value)
-        for key in events["global"]:
-            var_name = key
-            value = events["global"][key][1]
-            handle = self.api.exchange.get_global_handle(var_name)
-            self.api.exchange.set_global_value(handle, value)
+        for key, event in events["actuator"].items():
+            exchange.set_actuator_value(self.handles.control(key, keys[key]), event[1])
+        for key, event in events["global"].items():
+            exchange.set_global_value(self.handles.control(key, keys[key]), event[1])
 
         # if self.use_lock:
         #     # wait for next call of step
@@ -390,6 +775,25 @@ class Model:
         if not self.use_lock and self.agent:
             self.agent.step(self.current_state, self.queue, self.counter - 1)
 
+    def _get_changed_events(self, events):
+        """
+        Drop the events whose value is already applied. EnergyPlus keeps the value of an actuator or a global variable
+        until it is set again, so only the changed values need to be sent and applied.
+
+        :parameter events: The events in the format of ``EventQueue.trigger()``.
+
+        :return: The events with changed values, in the same format.
+        """
+        changed = {"actuator": dict(), "global": dict()}
+        for type in changed:
+            applied_values = self.applied_values[type]
+            for key, event in events[type].items():
+                value = event[1]
+                if key not in applied_values or applied_values[key] != value:
+                    applied_values[key] = value
+                    changed[type][key] = event
+        return changed
+
     def step(self, action_list: list):
         """
         Add all actions into the ``EventQueue``, and then generate the state value of the next timestep.
@@ -402,27 +806,47 @@ class Model:
             for action in action_list:
                 self.queue.schedule_event(**action)
         # print("Parent: Sending actions")
-        self.parent.send(self.queue.trigger(self.counter))
-        self.counter += 1
         # Let process grab and execute actions
-        # print("Parent: Releasing child's lock")
-        self.wait_for_state.clear()
-        self.wait_for_step.set()
+        self.transport.send_actions(self._get_changed_events(self.queue.trigger(self.counter)), self.queue.keys)
+        self.counter += 1
         # print("Parent: Waiting for state values")
-        if not self.parent.poll():
-            self.wait_for_state.wait()
-        self.wait_for_state.clear()
-        current_state = self.parent.recv()
-        if current_state != "Terminated":
-            self.current_state = current_state
+        current_state = self.transport.recv_state()
+        if current_state is not None:
+            self.current_state = self._wrap_state(current_state)
             self.historical_values.append(self.current_state)
         else:
             self.terminate = True
             self.child.join()
-        self.wait_for_state.clear()
+            self._stop_simulation()
         # print("Parent: received state values")
         return self.current_state
 
+    def _stop_simulation(self):
+        """
+        Stop the EnergyPlus process started by ``reset`` if it is still running, and release the transport.
+
+        :return: None
+        """
+        if self.child is not None:
+            if self.child.is_alive():
+                self.child.terminate()
+            self.child.join()
+            self.child = None
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    def close(self):
+        """
+        Stop the running simulation, and remove the run directory if it is created by the model. The run directory
+        given by the user is kept.
+
+        :return: None
+        """
+        self._stop_simulation()
+        if self.temporary_run_directory:
+            shutil.rmtree(self.run_directory, ignore_errors=True)
+
     def is_terminate(self):
         """
         Determine if the simulation is finished or not.
@@ -437,21 +861,21 @@ class Model:
         
         :return: The initial state of the simulation.
         """
+        self._stop_simulation()
         self._init_simulation()
-        self.queue = EventQueue()
+        self.queue = EventQueue(compact=True, max_keys=self.max_actions if self.shared_memory else None)
         self.historical_values = list()
         self.ignore_list = set()
-        self.wait_for_state.clear()
-        self.wait_for_step.clear()
         self.terminate = False
         self.use_lock = True
-        self.parent, self.child_energy = Pipe(duplex=True)
+        if self.shared_memory:
+            self.transport = SharedMemoryTransport(self.observation_spec.size, self.max_actions)
+        else:
+            self.transport = PipeTransport()
         self.child = Process(target=self.simulate)
         self.child.start()
-        self.wait_for_state.wait()
-        self.current_state = self.parent.recv()
+        self.current_state = self._wrap_state(self.transport.recv_state())
         self.historical_values.append(self.current_state)
-        self.wait_for_state.clear()
         return self.current_state
 
     def simulate(self, terminate_after_warmup=False):
@@ -473,6 +897,7 @@ class Model:
         # self.current_handle["temperature"] = self.api.exchange.get_variable_handle("SITE OUTDOOR AIR DRYBULB TEMPERATURE", "ENVIRONMENT")
         # self.current_handle["energy"] = self.api.exchange.get_meter_handle("Electricity:Facility")
         self.api = EnergyPlusAPI()
+        self.handles = None
         if not terminate_after_warmup:
             self.api.runtime.callback_after_new_environment_warmup_complete(self._initialization)
             self.api.runtime.callback_begin_system_timestep_before_predictor(self._step_callback)
@@ -480,8 +905,7 @@ class Model:
             self.api.runtime.callback_begin_new_environment(self._generate_output_files)
         self.api.runtime.run_energyplus(self.run_parameters)
         if self.use_lock:
-            self.child_energy.send("Terminated")
-            self.wait_for_state.set()
+            self.transport.terminate()
 
     def _init_simulation(self):
         """
@@ -489,12 +913,44 @@ class Model:
         
         :return: None.
         """
-        self.idf.saveas("input.idf")
+        self.idf.saveas(self.input_idf_path)
         self.use_lock = False
         self.zone_names = self.get_available_names_under_group("Zone")
         self._get_thermal_names()
+        self._get_observation_spec()
+        self.applied_values = {"actuator": dict(), "global": dict()}
         self.warmup_complete = False
 
+    def _get_observation_spec(self):
+        """
+        Freeze the requested output variables and compile the layout of the state, so the step callback does not need to scan the IDF.
+
+        :return: None
+        """
+        if self.idf.idfobjects.get("Output:Variable"):
+            self.output_variables = frozenset(self.get_available_names_under_group("Output:Variable"))
+        else:
+            self.output_variables = frozenset()
+        if self.default_observation:
+            self.observation_spec = ObservationSpec()
+            self.observation_spec.add_variable("temperature", "Zone Air Temperature", self.zone_names)
+            self.observation_spec.add_meter("energy", "Heating:EnergyTransfer")
+            if "Zone Thermal Comfort Fanger Model PMV" in self.output_variables:
+                self.observation_spec.add_variable("PMV", "Zone Thermal Comfort Fanger Model PMV", self.thermal_names)
+        if self.observation_spec.layout is None:
+            self.observation_spec.compile()
+        self.state_buffer = self.observation_spec.empty()
+
+    def _wrap_state(self, values):
+        """
+        Wrap the state vector with the dictionary view.
+
+        :parameter values: The state vector.
+
+        :return: The ``State`` object.
+        """
+        return State(self.observation_spec, values, {"occupancy": dict()})
+
     def get_current_state_values(self):
         """
         Find the current entries in the state.
@@ -588,31 +1044,46 @@ class Model:
     def get_possible_actions(self):
         """
         Get all available actions that the user-defined agent can take. This list of actions only depends on the building architecture.
+
+        The actions are cached in a catalog keyed by the hash of the current components, the IDD version and the EMS
+        reporting options, so the warmup run that generates the EDD file only happens once for each building.
         
         :return: List of available actions in dictionaries.
         """
-        if not os.path.isfile("./result/eplusout.edd"):
-            if not self.get_configuration("Output:EnergyManagementSystem"):
-                self.add_configuration("Output:EnergyManagementSystem",
-                                       values={"Actuator Availability Dictionary Reporting": "Verbose",
-                                               "Internal Variable Availability Dictionary Reporting": "Verbose",
-                                               "EMS Runtime Language Debug Output Level": "ErrorsOnly"})
+        if not self.get_configuration("Output:EnergyManagementSystem"):
+            self.add_configuration("Output:EnergyManagementSystem",
+                                   values={"Actuator Availability Dictionary Reporting": "Verbose",
+                                           "Internal Variable Availability Dictionary Reporting": "Verbose",
+                                           "EMS Runtime Language Debug Output Level": "ErrorsOnly"})
+        key = self._get_content_key()
+
+        actuators = load_actuator_catalog(key)
+        if actuators is None:
+            edd_path = os.path.join(self.output_directory, "eplusout.edd")
+            if os.path.isfile(edd_path):
+                os.remove(edd_path)
             try:
                 self.simulate(terminate_after_warmup=True)
             except AssertionError:
                 pass
+            actuators = save_actuator_catalog(key, parse_edd(edd_path))
+
+        return [{"Component Type": component_type,
+                 "Control Type": control_type,
+                 "Actuator Key": actuator_key} for component_type, control_type, actuator_key in actuators.tolist()]
 
-        actions = list()
-        with open("./result/eplusout.edd", 'r') as edd:
-            for line in edd:
-                line = line.strip()
-                if len(line) == 0 or line[0] == '!':
-                    continue
-                line = line.split(',')
-                actions.append({"Component Type": line[2],
-                                "Control Type": line[3],
-                                "Actuator Key": line[1]})
-        return actions
+    def _get_content_key(self):
+        """
+        Hash the field values of all components in memory, so any change to the building model gives a new key without
+        saving the IDF.
+
+        :return: The content key of the building model.
+        """
+        components = [(idf_header_name, [entry.fieldvalues for entry in entries])
+                      for idf_header_name, entries in self.idf.idfobjects.items() if len(entries)]
+        ems_options = self.get_configuration("Output:EnergyManagementSystem")[0].fieldvalues[1:]
+        return hash_content(pickle.dumps(components, protocol=4), str(IDF.idd_version),
+                            *[str(option) for option in ems_options])
 
     def get_link_zones(self):
         """
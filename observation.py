@@ -0,0 +1,257 @@
+import numpy as np
+from collections.abc import MutableMapping
+
+
+class ObservationSpec:
+    """
+    Declarative description of the state values read from EnergyPlus at each timestep.
+
+    Declare the output variables, meters and EMS internal variables once, and ``compile`` the spec to a fixed ordering.
+    At each timestep the values are written into a preallocated float64 buffer, and the ``State`` class provides the
+    named views that keep the dictionary interface of the state.
+    """
+
+    def __init__(self):
+        self.entries = list()
+        self.layout = None
+        self.groups = None
+        self.size = 0
+        self.readers = None
+
+    def _add_entry(self, entry, kind, name, keys):
+        if self.layout is not None:
+            raise ValueError("Cannot add entries to a compiled observation spec")
+        if entry in [previous[0] for previous in self.entries]:
+            raise ValueError(f"Duplicate entry {entry} in the observation spec")
+        if keys is not None and not isinstance(keys, str):
+            keys = tuple(keys)
+        self.entries.append((entry, kind, name, keys))
+        return self
+
+    def add_variable(self, entry, variable_name, keys):
+        """
+        Add an output variable to the state.
+
+        :parameter entry: The entry name of the value in the state, e.g. "temperature".
+
+        :parameter variable_name: The name of the output variable, e.g. "Zone Air Temperature".
+
+        :parameter keys: A list of keys (usually zone names) to group the values under the entry, or a single key to store the value directly under the entry.
+
+        :return: The observation spec itself.
+        """
+        return self._add_entry(entry, "variable", variable_name, keys)
+
+    def add_meter(self, entry, meter_name):
+        """
+        Add a meter to the state.
+
+        :parameter entry: The entry name of the value in the state, e.g. "energy".
+
+        :parameter meter_name: The name of the meter, e.g. "Heating:EnergyTransfer".
+
+        :return: The observation spec itself.
+        """
+        return self._add_entry(entry, "meter", meter_name, None)
+
+    def add_internal_variable(self, entry, variable_type, keys):
+        """
+        Add an EMS internal variable to the state.
+
+        :parameter entry: The entry name of the value in the state.
+
+        :parameter variable_type: The type of the internal variable, e.g. "Zone Floor Area".
+
+        :parameter keys: A list of keys to group the values under the entry, or a single key to store the value directly under the entry.
+
+        :return: The observation spec itself.
+        """
+        return self._add_entry(entry, "internal", variable_type, keys)
+
+    def compile(self):
+        """
+        Freeze the declared entries to a fixed ordering of the state vector.
+
+        :return: The observation spec itself.
+        """
+        layout = list()
+        groups = dict()
+        for entry, kind, name, keys in self.entries:
+            if keys is None or isinstance(keys, str):
+                groups[entry] = len(layout)
+                layout.append((kind, name, keys))
+            else:
+                start = len(layout)
+                layout.extend((kind, name, key) for key in keys)
+                groups[entry] = (start, len(layout), {key: i for i, key in enumerate(keys)})
+        self.layout = tuple(layout)
+        self.groups = groups
+        self.size = len(layout)
+        return self
+
+    def index(self, entry, key=None):
+        """
+        Find the position of a value in the state vector.
+
+        :parameter entry: The entry name of the value in the state.
+
+        :parameter key: The key of the value if the entry groups multiple values.
+
+        :return: The index of the value in the state vector.
+        """
+        group = self.groups[entry]
+        if isinstance(group, int):
+            return group
+        return group[0] + group[2][key]
+
+    def resolve(self, handles):
+        """
+        Resolve the handles of all values in the layout. Must be called in the process that runs the EnergyPlus.
+
+        :parameter handles: The ``HandleRegistry`` of the running EnergyPlus instance.
+
+        :return: None
+        """
+        exchange = handles.exchange
+        readers = list()
+        for kind, name, key in self.layout:
+            if kind == "variable":
+                readers.append((exchange.get_variable_value, handles.variable(name, key)))
+            elif kind == "meter":
+                readers.append((exchange.get_meter_value, handles.meter(name)))
+            else:
+                readers.append((exchange.get_internal_variable_value, handles.internal_variable(name, key)))
+        self.readers = tuple(readers)
+
+    def read(self, buffer):
+        """
+        Read the current values from EnergyPlus into the buffer.
+
+        :parameter buffer: A float64 numpy array with the size of the spec.
+
+        :return: The buffer.
+        """
+        for i, (get_value, handle) in enumerate(self.readers):
+            buffer[i] = get_value(handle)
+        return buffer
+
+    def empty(self):
+        """
+        Allocate a buffer for the state vector.
+
+        :return: A float64 numpy array with the size of the spec.
+        """
+        return np.zeros(self.size, dtype=np.float64)
+
+
+class State(MutableMapping):
+    """
+    Dictionary view of a state vector. Assigning to a declared entry writes into the vector. Entries that are not
+    declared in the ``ObservationSpec`` (e.g. "occupancy") can be added as usual, and are stored aside of the vector.
+    """
+
+    def __init__(self, spec, values, extras=None):
+        """
+        :parameter spec: The compiled ``ObservationSpec``.
+
+        :parameter values: The state vector.
+
+        :parameter extras: Entries that are not backed by the state vector.
+        """
+        self.spec = spec
+        self.values = values
+        self.extras = dict() if extras is None else extras
+
+    @property
+    def vector(self):
+        """
+        The contiguous float64 state vector, in the order of the ``ObservationSpec`` layout.
+        """
+        return self.values
+
+    def __getitem__(self, entry):
+        if entry in self.extras:
+            return self.extras[entry]
+        group = self.spec.groups[entry]
+        if isinstance(group, int):
+            return float(self.values[group])
+        view = StateGroup(group[2], self.values[group[0]:group[1]])
+        self.extras[entry] = view
+        return view
+
+    def __setitem__(self, entry, value):
+        group = self.spec.groups.get(entry)
+        if group is None:
+            self.extras[entry] = value
+        elif isinstance(group, int):
+            self.values[group] = value
+        else:
+            # Write the declared keys into the vector, the other keys are kept aside in the group view
+            view = self[entry]
+            for key, key_value in value.items():
+                view[key] = key_value
+
+    def __delitem__(self, entry):
+        del self.extras[entry]
+
+    def __iter__(self):
+        yield from self.spec.groups
+        for entry in self.extras:
+            if entry not in self.spec.groups:
+                yield entry
+
+    def __len__(self):
+        return len(self.spec.groups) + sum(1 for entry in self.extras if entry not in self.spec.groups)
+
+    def to_dict(self):
+        """
+        Convert the state to the nested dictionary.
+
+        :return: A dictionary maps the entry to the value, or to the dictionary of key and value.
+        """
+        return {entry: dict(value) if isinstance(value, MutableMapping) else value for entry, value in self.items()}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class StateGroup(MutableMapping):
+    """
+    Dictionary view of the values grouped under one entry of the state, e.g. the temperature of all zones.
+    """
+
+    def __init__(self, index, values):
+        """
+        :parameter index: A dictionary maps the key to the position in values.
+
+        :parameter values: The slice of the state vector that belongs to this entry.
+        """
+        self.index = index
+        self.values = values
+        self.extras = dict()
+
+    def __getitem__(self, key):
+        i = self.index.get(key)
+        if i is None:
+            return self.extras[key]
+        return float(self.values[i])
+
+    def __setitem__(self, key, value):
+        i = self.index.get(key)
+        if i is None:
+            self.extras[key] = value
+        else:
+            self.values[i] = value
+
+    def __delitem__(self, key):
+        del self.extras[key]
+
+    def __iter__(self):
+        yield from self.index
+        yield from self.extras
+
+    def __len__(self):
+        return len(self.index) + len(self.extras)
+
+    def __repr__(self):
+        return repr(dict(self))
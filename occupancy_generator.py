@@ -1,7 +1,14 @@
+import calendar
+import os
 import numpy as np
-from random import choice
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import chain
+from multiprocessing import Pool
 from datetime import datetime, timedelta
 
+from model import Model
+
 
 class OccupancyGenerator:
     """
@@ -11,7 +18,8 @@ class OccupancyGenerator:
 
     def __init__(self,
                  model,
-                 num_occupant=10):
+                 num_occupant=10,
+                 seed=None):
         """
         This class contains multiple editable attributes to generate the occupancy schedule. Default setting includes:
         Work shift: 9:00 ~ 17:00, where people start arriving/leaving 30 minutes earily.
@@ -25,6 +33,8 @@ class OccupancyGenerator:
         :parameter model: The ``COBS.Model`` class object as the target building model.
         
         :parameter num_occupant: The number of long-term occupants belongs to the model.
+
+        :parameter seed: An integer or a ``numpy.random.SeedSequence`` that determines all random choices. Each day has its own random stream spawned from the seed, so the occupancy of a day is the same no matter which days are generated before it. If None, a fresh seed is used.
         """
         self.start_work = 9 * 60 * 60  # Work start from 9:00. unit: second
         self.end_work = 17 * 60 * 60  # Work end at 17:00. unit: second
@@ -50,26 +60,82 @@ class OccupancyGenerator:
         self.std_stay_customer = 5 * 60
         # TODO: Add zone trespass time
         self.model = model
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.rng = self._get_stream(0)
         self.possible_locations = self.model.get_available_names_under_group("Zone")
         self.work_zones = self.possible_locations[:]
         self.zone_link = model.get_link_zones()
-        self.meeting_room = choice(self.possible_locations)
-        self.lunch_room = choice(self.possible_locations)
-        self.entry_zone = choice(list(self.zone_link["Outdoor"]))
+        self.paths = self._get_path_table()
+        self.meeting_room = self.possible_locations[self.rng.integers(len(self.possible_locations))]
+        self.lunch_room = self.possible_locations[self.rng.integers(len(self.possible_locations))]
+        outdoor_links = sorted(self.zone_link["Outdoor"])
+        self.entry_zone = outdoor_links[self.rng.integers(len(outdoor_links))]
         self.possible_locations.insert(0, "Outdoor")
         self.possible_locations.append("busy")
+        self.location_index = {location: i for i, location in enumerate(self.possible_locations)}
 
         self.work_zones.remove(self.lunch_room)
         if self.meeting_room != self.lunch_room:
             self.work_zones.remove(self.meeting_room)
 
-        self.worker_assign = [Person(self, office=choice(self.work_zones)) for _ in range(num_occupant)]
+        self.worker_assign = [Person(self, office=self.work_zones[i])
+                              for i in self.rng.integers(len(self.work_zones), size=num_occupant).tolist()]
+        self.availability = OfficeAvailability(self.day_cut_off)
 
         # value = (np.random.beta(eat_time_a, eat_time_b, 10000) + 0.1) * 100
 
+    def _get_stream(self, *key):
+        """
+        Create the random stream identified by the key under the seed of the generator. The same seed and key always
+        give the same stream.
+
+        :parameter key: Integers that identify the stream, (0,) for the setup and (1, day ordinal) for each day.
+
+        :return: A ``numpy.random.Generator``.
+        """
+        return np.random.default_rng(np.random.SeedSequence(self.seed_sequence.entropy,
+                                                            spawn_key=self.seed_sequence.spawn_key + key))
+
+    def set_date(self, date):
+        """
+        Switch to the random stream of the given day, so the simulated day only depends on the seed and the date.
+
+        :parameter date: The day to simulate.
+
+        :return: None
+        """
+        self.rng = self._get_stream(1, date.toordinal())
+
+    def _get_path_table(self):
+        """
+        Run one BFS from each zone to find the shortest paths to all other zones. A path from a zone to itself goes
+        out to the first neighbor and comes back, and a zone without any path to the target stays in place.
+
+        :return: A dictionary maps the start zone to a dictionary maps the target zone to the path in a tuple.
+        """
+        paths = dict()
+        for start in self.zone_link:
+            table = {start: (start,)}
+            queue = deque([start])
+            loop = None
+            while queue:
+                vertex = queue.popleft()
+                for node in sorted(self.zone_link.get(vertex, ())):
+                    if node == start:
+                        if loop is None:
+                            loop = table[vertex] + (start,)
+                    elif node not in table:
+                        table[node] = table[vertex] + (node,)
+                        queue.append(node)
+            table[start] = loop if loop is not None else (start,)
+            paths[start] = table
+        return paths
+
     def get_path(self, start, end):
         """
-        Use BFS to find the shortest path between two zones.
+        Find the shortest path between two zones from the precomputed BFS paths.
 
         :parameter start: The entry of the start zone.
 
@@ -77,44 +143,155 @@ class OccupancyGenerator:
 
         :return: A list of zone names that the occupant need to cross.
         """
-        queue = [(start, [start])]
-        visited = set()
-
-        while queue:
-            vertex, path = queue.pop(0)
-            visited.add(vertex)
-            for node in self.zone_link[vertex]:
-                if node == end:
-                    return path + [end]
-                else:
-                    if node not in visited:
-                        visited.add(node)
-                        queue.append((node, path + [node]))
-        return [start]
+        return list(self.paths[start].get(end, (start,)))
+
+    def _group_by_office(self, people):
+        """
+        Group the people by their offices, because the routes of the people in the same office share the same zones.
+
+        :parameter people: list of ``Person`` objects.
+
+        :return: A dictionary maps the office to the list of positions of its people in the given list.
+        """
+        groups = dict()
+        for i, person in enumerate(people):
+            groups.setdefault(person.office, list()).append(i)
+        return groups
+
+    def _paint_round_trip(self, people, pass_zones, move_times):
+        """
+        Apply the trips along the zones and back to the daily route of the people.
+
+        :parameter people: list of ``Person`` objects.
+
+        :parameter pass_zones: The zones on the way, the last zone is the destination.
+
+        :parameter move_times: A numpy matrix of (people, 2 * zones), the times to enter each zone on the way, followed by the times to leave each zone on the way back.
+
+        :return: None
+        """
+        num_zones = len(pass_zones)
+        locations = [self.location_index[pass_zones[num_zones - abs(i - num_zones + 1) - 1]]
+                     for i in range(2 * num_zones - 1)]
+        for person, times in zip(people, move_times.tolist()):
+            position = person.position
+            for i, location in enumerate(locations):
+                position.paint(times[i], times[i + 1], location)
+
+    def simulate_arrivals(self, people):
+        """
+        Each person need to decide if he/she will come to work today, when exactly they come, and when exactly
+        they leave. We assume people start to come at 8:30 am and leave at 5 pm, with a poisson arrival lambda = 30 min.
+        All random times are drawn for the whole population at once.
+
+        :parameter people: list of ``Person`` objects with offices.
+
+        :return: A numpy bool array, True if the person comes to work.
+        """
+        num_people = len(people)
+        for person in people:
+            person.position = Trajectory(self.day_cut_off)
+        absent = self.rng.random(num_people) < self.call_for_absence
+        arrival_time = (self.start_work - self.come_leave_flex_coef) + \
+            self.rng.exponential(self.come_leave_flex_coef, num_people).astype(np.int64)
+        leave_time = self.end_work + self.rng.exponential(self.come_leave_flex_coef, num_people).astype(np.int64)
+        leave_time = np.minimum(leave_time, self.day_cut_off - 1)
+        come = ~absent & (arrival_time <= self.cut_off_time)
+
+        come_people = [people[i] for i in np.flatnonzero(come)]
+        arrival_time, leave_time = arrival_time[come], leave_time[come]
+        for office, members in self._group_by_office(come_people).items():
+            pass_zones = self.get_path(self.entry_zone, office)
+            # TODO: Trespass time
+            enter_times = arrival_time[members, None] + get_walk_offsets(len(members), len(pass_zones), self.rng)
+            leave_times = leave_time[members, None] - get_walk_offsets(len(members), len(pass_zones), self.rng)
+            self._paint_round_trip([come_people[i] for i in members], pass_zones,
+                                   np.hstack([enter_times, leave_times[:, ::-1]]))
+        return come
+
+    def simulate_lunch(self, people):
+        """
+        Generate the time that the people go to the cafeteria and take the lunch. All random times are drawn for the
+        whole population at once.
+
+        :parameter people: list of ``Person`` objects with offices.
+
+        :return: None
+        """
+        num_people = len(people)
+        # Usually go for lunch immediately, with average delay of 5 minute
+        lunch_delay = np.maximum(self.rng.exponential(5 * 60, num_people).astype(np.int64), 20 * 60)
+        eat_time = ((self.rng.beta(self.eat_time_a, self.eat_time_b, num_people) + 0.1) * 6000).astype(np.int64)
+
+        for office, members in self._group_by_office(people).items():
+            pass_zones = self.get_path(office, self.lunch_room)
+            pass_zones.pop(0)
+            if not pass_zones:
+                continue
+            # TODO: Trespass time
+            go_times = self.lunch_start_time + lunch_delay[members, None] + \
+                get_walk_offsets(len(members), len(pass_zones), self.rng)
+            back_times = (go_times[:, -1:] + eat_time[members, None]) + \
+                get_walk_offsets(len(members), len(pass_zones), self.rng)
+            move_times = np.hstack([np.full((len(members), 1), self.lunch_start_time), go_times[:, 1:], back_times])
+            self._paint_round_trip([people[i] for i in members], pass_zones, move_times)
+
+    def simulate_meeting(self, people):
+        """
+        Generate the time that the people go to the daily meeting. All random times are drawn for the whole population
+        at once.
+
+        :parameter people: list of ``Person`` objects with offices.
+
+        :return: None
+        """
+        num_people = len(people)
+        # Arrive maximum 3 min early, 2 min late
+        meeting_attend = self.daily_report - \
+            np.maximum(self.rng.exponential(3 * 60, num_people).astype(np.int64), 5 * 60)
+        meeting_end = self.daily_report + \
+            self.rng.normal(self.daily_report_mean, self.daily_report_std, num_people).astype(np.int64)
+
+        for office, members in self._group_by_office(people).items():
+            pass_zones = self.get_path(office, self.meeting_room)
+            pass_zones.pop(0)
+            if not pass_zones:
+                continue
+            # TODO: Trespass time
+            go_times = meeting_attend[members, None] - get_walk_offsets(len(members), len(pass_zones), self.rng)
+            back_times = meeting_end[members, None] + get_walk_offsets(len(members), len(pass_zones), self.rng)
+            self._paint_round_trip([people[i] for i in members], pass_zones,
+                                   np.hstack([go_times[:, ::-1], back_times]))
 
     def generate_all_people_daily_movement(self):
         """
-        Generate a list of ``Person`` objects and simulate the movement for each person.
+        Generate a list of ``Person`` objects and simulate the movement for each person. The arrivals, lunches and
+        meetings are simulated for all workers at once. The customers and the visits to colleagues depend on where the
+        others are, so they are simulated person by person afterwards, with the colleagues found from the
+        ``availability`` index.
         
         :return: list of ``Person`` objects.
         """
-        available_worker = list()
-        for i, worker in enumerate(self.worker_assign):
-            if worker.decide_come():
-                available_worker.append(i)
-
-        # print(available_worker)
-
-        guests = np.random.poisson(self.guest_lambda)
-        guest_assign = np.random.choice(available_worker, size=guests)
+        available_worker = np.flatnonzero(self.simulate_arrivals(self.worker_assign)).tolist()
+        workers = [self.worker_assign[i] for i in available_worker]
+        self.simulate_lunch(workers)
+        self.simulate_meeting(workers)
+        self.availability = OfficeAvailability(self.day_cut_off)
+        for worker in workers:
+            self.availability.add(worker, self.location_index[worker.office])
+
+        guests = self.rng.poisson(self.guest_lambda)
+        if not available_worker:
+            guests = 0
+        guest_assign = self.rng.choice(available_worker, size=guests)
         all_people = list()
         guest_counter = 0
 
         for i in available_worker:
             worker = self.worker_assign[i]
             all_people.append(worker)
-            guest_list = np.random.randint(1, 4, size=np.sum(guest_assign == i))
-            appointments = worker.generate_daily_route(guest_list)
+            guest_list = self.rng.integers(1, 4, size=np.sum(guest_assign == i))
+            appointments = worker.generate_appointments(guest_list)
             for j, appointment in enumerate(appointments):
                 for _ in range(guest_list[j]):
                     new_guest = Person(self)
@@ -124,11 +301,41 @@ class OccupancyGenerator:
 
         return all_people
 
-    def generate_daily_schedule(self, add_to_model=True):
+    def get_segments(self, all_people):
+        """
+        Collect the daily routes of all people into flat arrays. The "busy" location is replaced by the office of the
+        person.
+
+        :parameter all_people: list of ``Person`` objects with the simulated movement.
+
+        :return: Four numpy arrays, (number of segments of each person, start time, end time and location index of each segment).
+        """
+        busy = self.location_index['busy']
+        counts = np.fromiter((len(person.position.times) for person in all_people), dtype=np.int64,
+                             count=len(all_people))
+        starts = np.fromiter(chain.from_iterable(person.position.times for person in all_people), dtype=np.int64,
+                             count=np.sum(counts))
+        locations = np.fromiter(chain.from_iterable(person.position.locations for person in all_people),
+                                dtype=np.int64, count=np.sum(counts))
+        offices = np.repeat([busy if person.office is None else self.location_index[person.office]
+                             for person in all_people], counts)
+        locations = np.where(locations == busy, offices, locations)
+        ends = np.empty_like(starts)
+        ends[:-1] = starts[1:]
+        ends[np.cumsum(counts) - 1] = self.day_cut_off
+        return counts, starts, ends, locations
+
+    def generate_daily_schedule(self, add_to_model=True, date=None, schedule_file=False, schedule_path=None):
         """
         Generate a numpy matrix contains the locations of all occupants in the day and add tp the model.
         
         :parameter add_to_model: Default is True. If False, then only generate the schedule in numpy and IDF format but not save to the model automatically.
+
+        :parameter date: The day to simulate. If given, the random stream of the day is used, otherwise the current stream continues.
+
+        :parameter schedule_file: Set to True to write the occupancy of every weekday of the year into a CSV file referenced by Schedule:File, instead of one Schedule:Compact field pair per change of occupancy.
+
+        :parameter schedule_path: The path of the CSV file if schedule_file is True. Default is occupancy.csv in the run directory of the model.
         
         :return: Three objects, (IDF format schedule, numpy format schedule, list of all accessble locations in the building).
         """
@@ -137,96 +344,334 @@ class OccupancyGenerator:
         for zone in all_zones:
             if zone in self.possible_locations:
                 valid_zones.append(zone)
+        if date is not None:
+            self.set_date(date)
         all_people = self.generate_all_people_daily_movement()
-        locations = list()
-        for person in all_people:
-            locations.append(person.position.copy())
-            if person.office is not None:
-                locations[-1][locations[-1] == self.possible_locations.index('busy')] = \
-                    self.possible_locations.index(person.office)
-
-        location_matrix = np.vstack(locations)
+        _, starts, ends, locations = self.get_segments(all_people)
+        location_matrix = np.repeat(locations.astype(np.int16), ends - starts).reshape(len(all_people),
+                                                                                        self.day_cut_off)
         all_commands = list()
 
         if add_to_model:
-            activity_values = {"Name": "Test_Activity_Schedule",
-                               "Schedule Type Limits Name": "Any Number",
-                               "Field 1": "Through:12/31",
-                               "Field 2": "For: Alldays",
-                               "Field 3": "Until 24:00",
-                               "Field 4": "200"}
-
-            work_efficiency = {"Name": "Test_Work_Schedule",
-                               "Schedule Type Limits Name": "Fraction",
-                               "Field 1": "Through:12/31",
-                               "Field 2": "For: Alldays",
-                               "Field 3": "Until 24:00",
-                               "Field 4": "0.1"}
-
-            cloth_schedule = {"Name": "Test_Cloth_Schedule",
-                              "Schedule Type Limits Name": "Fraction",
-                              "Field 1": "Through:12/31",
-                              "Field 2": "For: Alldays",
-                              "Field 3": "Until 24:00",
-                              "Field 4": "0.9"}
-
-            air_velocity = {"Name": "Test_Air_Velocity",
-                            "Schedule Type Limits Name": "Fraction",
-                            "Field 1": "Through:12/31",
-                            "Field 2": "For: Alldays",
-                            "Field 3": "Until 24:00",
-                            "Field 4": "0.25"}
-
-            self.model.add_configuration("Schedule:Compact", values=activity_values)
-            self.model.add_configuration("Schedule:Compact", values=work_efficiency)
-            self.model.add_configuration("Schedule:Compact", values=cloth_schedule)
-            self.model.add_configuration("Schedule:Compact", values=air_velocity)
-            self.model.add_configuration("Output:Variable", values={"Variable Name": "Zone People Occupant Count",
-                                                                    "Reporting_Frequency": "timestep"})
-            self.model.add_configuration("Output:Variable",
-                                         values={"Variable Name": "Zone Thermal Comfort Fanger Model PMV",
-                                                 "Reporting_Frequency": "timestep"})
-
-        zone_occupancy = np.zeros((len(self.possible_locations), 24 * 60))
-
-        for zone in valid_zones:
-            i = self.possible_locations.index(zone)
-            occupancy = np.sum(location_matrix == i, axis=0)
-
+            self._add_shared_configurations()
+
+        num_minutes = 24 * 60
+        zone_rows = [self.location_index[zone] for zone in valid_zones]
+        zone_occupancy = np.zeros((len(self.possible_locations), num_minutes))
+        zone_occupancy[zone_rows] = self.count_zone_occupancy(all_people)[zone_rows]
+        people_values = list()
+
+        if schedule_file:
+            year = (self.start_synthetic_data if date is None else date).year
+            days_in_year = 366 if calendar.isleap(year) else 365
+            first_weekday = datetime(year, 1, 1).weekday()
+            day_occupancy = zone_occupancy[zone_rows].astype(np.int32)
+            schedule_path = self._get_schedule_path(schedule_path)
+            write_occupancy_csv(schedule_path, valid_zones,
+                                (day_occupancy if (first_weekday + day) % 7 < 5 else None
+                                 for day in range(days_in_year)))
+            all_commands = self._add_schedule_files(valid_zones, schedule_path, days_in_year, add_to_model)
+            return all_commands, location_matrix, zone_occupancy, self.possible_locations
+
+        # A field pair is written at the last minute of each run of the same occupancy
+        occupancy = zone_occupancy[zone_rows].astype(np.int64)
+        run_ends = np.ones(occupancy.shape, dtype=bool)
+        run_ends[:, :-1] = occupancy[:, 1:] != occupancy[:, :-1]
+        zone_ids, minutes = np.nonzero(run_ends)
+        boundaries = np.cumsum(np.bincount(zone_ids, minlength=len(valid_zones))).tolist()
+        untils = [f"Until {(t + 1) // 60:02d}:{(t + 1) % 60:02d}" for t in range(num_minutes)]
+        until_fields = [untils[t] for t in minutes.tolist()]
+        value_fields = [str(value) for value in occupancy[zone_ids, minutes].tolist()]
+        field_names = [f"Field {counter}" for counter in range(3, 3 + 2 * num_minutes)]
+
+        for j, zone in enumerate(valid_zones):
+            first = boundaries[j - 1] if j else 0
             result_command = {"Name": f"Generated_Schedule_Zone_{zone}",
                               "Schedule Type Limits Name": "Any Number",
                               "Field 1": "Through: 12/31",
                               "Field 2": "For: Weekdays"}
-
-            counter = 3
-            for t in range(1, 24 * 60 + 1):
-                zone_occupancy[i, t - 1] = occupancy[t * 60 - 1]
-                if t != 24 * 60 and occupancy[(t + 1) * 60 - 1] == occupancy[t * 60 - 1]:
-                    continue
-                hour = t // 60
-                min = t % 60
-                result_command[f"Field {counter}"] = f"Until {hour:02d}:{min:02d}"
-                result_command[f"Field {counter + 1}"] = f"{occupancy[t * 60 - 1]}"
-                counter += 2
+            result_command.update(zip(field_names, chain.from_iterable(zip(until_fields[first:boundaries[j]],
+                                                                           value_fields[first:boundaries[j]]))))
 
             all_commands.append(result_command)
             if add_to_model:
-                self.model.add_configuration("Schedule:Compact", values=result_command)
+                # The schedule holds the number of occupants, not a fraction, the same as the Schedule:File
+                people_values.append(self._get_people_values(zone, f"Generated_Schedule_Zone_{zone}", 1))
 
-                people_values = {"Name": f"Test_Zone_{zone}",
-                                 "Zone or ZoneList Name": zone,
-                                 "Number of People Schedule Name": f"Generated_Schedule_Zone_{zone}",
-                                 "Number of People": location_matrix.shape[0],
-                                 "Activity Level Schedule Name": "Test_Activity_Schedule",
-                                 "Work Efficiency Schedule Name": "Test_Work_Schedule",
-                                 "Clothing Insulation Schedule Name": "Test_Cloth_Schedule",
-                                 "Air Velocity Schedule Name": "Test_Air_Velocity",
-                                 "Thermal Comfort Model 1 Type": "Fanger"}
-
-                self.model.add_configuration("People", values=people_values)
+        if add_to_model:
+            self.model.add_configurations("Schedule:Compact", all_commands)
+            self.model.add_configurations("People", people_values)
 
         return all_commands, location_matrix, zone_occupancy, self.possible_locations
 
+    def _get_schedule_path(self, schedule_path):
+        """
+        :parameter schedule_path: The path of the CSV file referenced by the Schedule:File, or None.
+
+        :return: The absolute path, default is occupancy.csv in the run directory of the model.
+        """
+        if schedule_path is None:
+            schedule_path = os.path.join(self.model.run_directory, "occupancy.csv")
+        return os.path.abspath(schedule_path)
+
+    def _add_schedule_files(self, valid_zones, schedule_path, days_in_year, add_to_model):
+        """
+        Generate the Schedule:File of each zone that reads its column of the CSV file written by
+        ``write_occupancy_csv``, and add them with the People of each zone to the model.
+
+        :parameter valid_zones: The zones in the order of the columns.
+
+        :parameter schedule_path: The absolute path of the CSV file.
+
+        :parameter days_in_year: Number of days in the CSV file.
+
+        :parameter add_to_model: If False, then only generate the settings but not save to the model.
+
+        :return: List of the settings of the Schedule:File.
+        """
+        schedules = list()
+        all_people = list()
+        for column, zone in enumerate(valid_zones):
+            schedules.append({"Name": f"Generated_Schedule_Zone_{zone}",
+                              "Schedule Type Limits Name": "Any Number",
+                              "File Name": schedule_path,
+                              "Column Number": column + 1,
+                              "Rows to Skip at Top": 1,
+                              "Number of Hours of Data": days_in_year * 24,
+                              "Column Separator": "Comma",
+                              "Interpolate to Timestep": "No",
+                              "Minutes per Item": 1})
+            # The schedule holds the number of occupants, not a fraction
+            all_people.append(self._get_people_values(zone, f"Generated_Schedule_Zone_{zone}", 1))
+        if add_to_model:
+            self.model.add_configurations("Schedule:File", schedules)
+            self.model.add_configurations("People", all_people)
+        return schedules
+
+    def _add_shared_configurations(self):
+        """
+        Add the schedules shared by the People of all zones, and the output variables of the occupancy.
+
+        :return: None
+        """
+        activity_values = {"Name": "Test_Activity_Schedule",
+                           "Schedule Type Limits Name": "Any Number",
+                           "Field 1": "Through:12/31",
+                           "Field 2": "For: Alldays",
+                           "Field 3": "Until 24:00",
+                           "Field 4": "200"}
+
+        work_efficiency = {"Name": "Test_Work_Schedule",
+                           "Schedule Type Limits Name": "Fraction",
+                           "Field 1": "Through:12/31",
+                           "Field 2": "For: Alldays",
+                           "Field 3": "Until 24:00",
+                           "Field 4": "0.1"}
+
+        cloth_schedule = {"Name": "Test_Cloth_Schedule",
+                          "Schedule Type Limits Name": "Fraction",
+                          "Field 1": "Through:12/31",
+                          "Field 2": "For: Alldays",
+                          "Field 3": "Until 24:00",
+                          "Field 4": "0.9"}
+
+        air_velocity = {"Name": "Test_Air_Velocity",
+                        "Schedule Type Limits Name": "Fraction",
+                        "Field 1": "Through:12/31",
+                        "Field 2": "For: Alldays",
+                        "Field 3": "Until 24:00",
+                        "Field 4": "0.25"}
+
+        self.model.add_configurations("Schedule:Compact",
+                                      [activity_values, work_efficiency, cloth_schedule, air_velocity])
+        self.model.add_configurations("Output:Variable",
+                                      [{"Variable Name": "Zone People Occupant Count",
+                                        "Reporting_Frequency": "timestep"},
+                                       {"Variable Name": "Zone Thermal Comfort Fanger Model PMV",
+                                        "Reporting_Frequency": "timestep"}])
+
+    @staticmethod
+    def _get_people_values(zone, schedule_name, number_of_people):
+        """
+        Generate the settings of the People in a zone.
+
+        :parameter zone: The zone entry.
+
+        :parameter schedule_name: The name of the number of people schedule.
+
+        :parameter number_of_people: The number of people multiplied to the schedule.
+
+        :return: A dictionary map the setting entry and the setting value.
+        """
+        return {"Name": f"Test_Zone_{zone}",
+                "Zone or ZoneList Name": zone,
+                "Number of People Schedule Name": schedule_name,
+                "Number of People": number_of_people,
+                "Activity Level Schedule Name": "Test_Activity_Schedule",
+                "Work Efficiency Schedule Name": "Test_Work_Schedule",
+                "Clothing Insulation Schedule Name": "Test_Cloth_Schedule",
+                "Air Velocity Schedule Name": "Test_Air_Velocity",
+                "Thermal Comfort Model 1 Type": "Fanger"}
+
+    def count_zone_occupancy(self, all_people):
+        """
+        Count the occupants in each location at the end of every minute of the day.
+
+        :parameter all_people: list of ``Person`` objects with the simulated movement.
+
+        :return: A numpy matrix of (locations, minutes), the rows follow the order of ``possible_locations``.
+        """
+        num_locations = len(self.possible_locations)
+        num_minutes = self.day_cut_off // 60
+        _, starts, ends, locations = self.get_segments(all_people)
+        # A segment covers the end of minute m (second 60 * m + 59) for m in [start // 60, end // 60)
+        size = num_locations * (num_minutes + 1)
+        changes = np.bincount(locations * (num_minutes + 1) + starts // 60, minlength=size) - \
+            np.bincount(locations * (num_minutes + 1) + ends // 60, minlength=size)
+        return np.cumsum(changes.reshape(num_locations, num_minutes + 1), axis=1)[:, :num_minutes]
+
+    def generate_schedule(self,
+                          start: datetime = None,
+                          end: datetime = None,
+                          add_to_model: bool = True,
+                          output_path: str = None,
+                          schedule_path: str = None):
+        """
+        Simulate the occupants of every day in the date range, and add the result to the model as one year-long
+        Schedule:File. Weekends are unoccupied. The zone occupancy is written day by day into a preallocated array, or
+        into an on-disk memmap if output_path is given, so long periods with many occupants run in bounded memory.
+        Each day is simulated with its own random stream, so splitting the range gives the same result.
+
+        :parameter start: The first day to simulate. Default is ``start_synthetic_data``.
+
+        :parameter end: The day after the last day to simulate. Default is ``end_synthetic_data``.
+
+        :parameter add_to_model: Default is True. If False, then only generate the schedule but not save to the model.
+
+        :parameter output_path: The path of the .npy file to store the zone occupancy. If None, the zone occupancy is kept in memory.
+
+        :parameter schedule_path: The path of the CSV file referenced by the Schedule:File. Default is occupancy.csv in the run directory of the model.
+
+        :return: Three objects, (zone occupancy in numpy of (days, zones, minutes), list of dates, list of zones).
+        """
+        if start is None:
+            start = self.start_synthetic_data
+        if end is None:
+            end = self.end_synthetic_data
+        if start.year != (end - timedelta(days=1)).year:
+            raise ValueError("The date range must be within one year")
+        all_zones = self.model.get_available_names_under_group("Zone")
+        valid_zones = [zone for zone in all_zones if zone in self.possible_locations]
+        zone_rows = [self.possible_locations.index(zone) for zone in valid_zones]
+        dates = [start + timedelta(days=day) for day in range((end - start).days)]
+        shape = (len(dates), len(valid_zones), self.day_cut_off // 60)
+
+        if output_path is None:
+            zone_occupancy = np.zeros(shape, dtype=np.int32)
+        else:
+            zone_occupancy = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.int32, shape=shape)
+        for day, date in enumerate(dates):
+            if date.weekday() >= 5:
+                zone_occupancy[day] = 0
+                continue
+            self.set_date(date)
+            all_people = self.generate_all_people_daily_movement()
+            zone_occupancy[day] = self.count_zone_occupancy(all_people)[zone_rows]
+
+        if add_to_model:
+            schedule_path = self._get_schedule_path(schedule_path)
+            days_in_year = 366 if calendar.isleap(start.year) else 365
+            first_day = start.timetuple().tm_yday - 1
+            write_occupancy_csv(schedule_path, valid_zones,
+                                (zone_occupancy[day - first_day] if first_day <= day < first_day + len(dates) else None
+                                 for day in range(days_in_year)))
+            self._add_shared_configurations()
+            self._add_schedule_files(valid_zones, schedule_path, days_in_year, True)
+
+        return zone_occupancy, dates, valid_zones
+
+
+def write_occupancy_csv(path, header, days, minutes_per_day=24 * 60):
+    """
+    Write the zone occupancy into a CSV file for Schedule:File, with one column per zone and one row per minute. Each
+    day is formatted at once by repeating the row format, which is much faster than formatting row by row, and the
+    text of a day is reused when the same matrix or an empty day comes again.
+
+    :parameter path: The path of the CSV file.
+
+    :parameter header: The names of the columns, written as the first row.
+
+    :parameter days: An iterable of the occupancy of each day, a numpy matrix of (columns, minutes), or None for a day without occupants.
+
+    :parameter minutes_per_day: Number of rows of each day.
+
+    :return: None
+    """
+    row_format = ",".join(["%d"] * len(header)) + "\n"
+    empty_day = (",".join(["0"] * len(header)) + "\n") * minutes_per_day
+    last_day, last_text = None, None
+    with open(path, 'w') as schedule_file:
+        schedule_file.write(",".join(header) + "\n")
+        for day in days:
+            if day is None:
+                schedule_file.write(empty_day)
+                continue
+            if day is not last_day:
+                last_day = day
+                last_text = (row_format * minutes_per_day) % tuple(np.asarray(day).T.ravel().tolist())
+            schedule_file.write(last_text)
+
+
+def _generate_building(energyplus_folder, job, seed):
+    """
+    Generate the occupancy of one building in a worker process of ``generate_buildings``.
+
+    :return: Three objects, (zone occupancy, list of dates, list of zones).
+    """
+    if not Model.model_import_flag:
+        Model.set_energyplus_folder(energyplus_folder)
+    model = Model(**job["model_arguments"])
+    try:
+        generator = OccupancyGenerator(model, job.get("num_occupant", 10), seed=seed)
+        zone_occupancy, dates, valid_zones = generator.generate_schedule(job.get("start"), job.get("end"),
+                                                                         add_to_model=False,
+                                                                         output_path=job.get("output_path"))
+    finally:
+        # Pool workers exit without running the finalizers, so the run directory must be removed here
+        model.close()
+    if job.get("output_path") is not None:
+        # The parent opens the file instead of receiving a copy
+        zone_occupancy.flush()
+        zone_occupancy = None
+    return zone_occupancy, dates, valid_zones
+
+
+def generate_buildings(jobs, seed=None, processes=None):
+    """
+    Generate the occupancy of many buildings in parallel worker processes. Each building gets its own random stream
+    spawned from the seed, so the results for a given seed are the same regardless of the number of processes.
+
+    :parameter jobs: List of dictionaries, each has "model_arguments" with the keyword arguments of ``Model``, and optionally "num_occupant", "start", "end" and "output_path" as in ``OccupancyGenerator.generate_schedule``.
+
+    :parameter seed: An integer or a ``numpy.random.SeedSequence``. If None, a fresh seed is used.
+
+    :parameter processes: Number of worker processes. Default is the number of CPUs.
+
+    :return: List of (zone occupancy, list of dates, list of zones) of each building. The zone occupancy with an output_path is opened from the file as a read-only memmap.
+    """
+    if not Model.model_import_flag:
+        raise ImportError("You have to set the energyplus folder first")
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(jobs))
+    with Pool(processes) as pool:
+        results = pool.starmap(_generate_building,
+                               [(Model.energyplus_folder, job, child) for job, child in zip(jobs, seeds)])
+    for i, job in enumerate(jobs):
+        if job.get("output_path") is not None:
+            results[i] = (np.load(job["output_path"], mmap_mode='r'),) + results[i][1:]
+    return results
+
 
 class Person:
     """
@@ -242,7 +687,7 @@ class Person:
         :parameter office: The designated office for long-term occupants.
         """
         self.office = office
-        self.position = np.zeros(generator.day_cut_off)
+        self.position = Trajectory(generator.day_cut_off)
         self.source = generator
 
     def customer_come(self, start_time, end_time, dest):
@@ -261,23 +706,24 @@ class Person:
 
         zone_move_timer = list()
         # real_start_time = start_time - int(np.random.exponential(5 * 60))  # Come eariler than expected
-        zone_move_timer.append(start_time - int(np.random.exponential(5 * 60)))  # Come eariler than expected
+        zone_move_timer.append(start_time - int(self.source.rng.exponential(5 * 60)))  # Come eariler than expected
         # decide the time takes from Room_1_1_150 door to the meeting room
         # TODO: Trespass time
         temp_timer = start_time
         for _ in pass_zones[1:]:
-            temp_timer = temp_timer - 3 + get_white_bias(1)
+            temp_timer = temp_timer - 3 + get_white_bias(1, rng=self.source.rng)
             zone_move_timer.insert(1, temp_timer)
 
         temp_timer = end_time
         for _ in pass_zones:
             zone_move_timer.append(temp_timer)
-            temp_timer = temp_timer + 3 + get_white_bias(1)
+            temp_timer = temp_timer + 3 + get_white_bias(1, rng=self.source.rng)
 
         # Apply to the daily route
         for i in range(len(zone_move_timer) - 1):
-            self.position[zone_move_timer[i]:zone_move_timer[i + 1]] = \
-                self.source.possible_locations.index(pass_zones[len(pass_zones) - abs(i - len(pass_zones) + 1) - 1])
+            self.position.paint(zone_move_timer[i], zone_move_timer[i + 1],
+                                self.source.possible_locations.index(
+                                    pass_zones[len(pass_zones) - abs(i - len(pass_zones) + 1) - 1]))
 
     def decide_come(self):
         """
@@ -287,43 +733,7 @@ class Person:
         
         :return: True if come to work, False otherwise
         """
-        self.position = np.zeros(self.source.day_cut_off)
-        # Decide absence
-        if np.random.random() < self.source.call_for_absence:
-            return False
-        else:
-            # Decide when come to office
-            arrival_time = (self.source.start_work - self.source.come_leave_flex_coef) + \
-                           int(np.random.exponential(self.source.come_leave_flex_coef))
-            if arrival_time > self.source.cut_off_time:
-                return False
-            else:
-                # Decide when go back home
-                leave_time = self.source.end_work + int(np.random.exponential(self.source.come_leave_flex_coef))
-                if leave_time >= self.source.day_cut_off:
-                    leave_time = self.source.day_cut_off - 1
-
-                pass_zones = self.source.get_path(self.source.entry_zone, self.office)
-
-                zone_move_timer = list()
-                # TODO: Trespass time
-                temp_timer = arrival_time
-                for _ in pass_zones:
-                    zone_move_timer.append(temp_timer)
-                    temp_timer = temp_timer + 3 + get_white_bias(1)
-
-                temp_timer = leave_time
-                for _ in pass_zones:
-                    zone_move_timer.insert(len(pass_zones), temp_timer)
-                    temp_timer = temp_timer - 3 + get_white_bias(1)
-
-                # Apply to the daily route
-                for i in range(len(zone_move_timer) - 1):
-                    self.position[zone_move_timer[i]:zone_move_timer[i + 1]] = \
-                        self.source.possible_locations.index(
-                            pass_zones[len(pass_zones) - abs(i - len(pass_zones) + 1) - 1])
-
-                return True
+        return bool(self.source.simulate_arrivals([self])[0])
 
     def generate_lunch(self):
         """
@@ -331,32 +741,7 @@ class Person:
         
         :return: None
         """
-        # Usually go for lunch immediately, with average delay of 5 minute
-        lunch_delay = int(np.random.exponential(5 * 60))
-        lunch_delay = max(lunch_delay, 20 * 60)
-
-        pass_zones = self.source.get_path(self.office, self.source.lunch_room)
-        pass_zones.pop(0)
-        zone_move_timer = [self.source.lunch_start_time]
-        # TODO: Trespass time
-        temp_timer = self.source.lunch_start_time + lunch_delay
-        for _ in pass_zones[:-1]:
-            temp_timer = temp_timer + 3 + get_white_bias(1)
-            zone_move_timer.append(temp_timer)
-
-        zone_move_timer.append(temp_timer +
-                               int((np.random.beta(self.source.eat_time_a, self.source.eat_time_b) + 0.1) * 6000))
-
-        temp_timer = zone_move_timer[-1]
-        for _ in pass_zones[:-1]:
-            temp_timer = temp_timer + 3 + get_white_bias(1)
-            zone_move_timer.append(temp_timer)
-
-        # Apply to the daily route
-        for i in range(len(zone_move_timer) - 1):
-            self.position[zone_move_timer[i]:zone_move_timer[i + 1]] = \
-                self.source.possible_locations.index(
-                    pass_zones[len(pass_zones) - abs(i - len(pass_zones) + 1) - 1])
+        self.source.simulate_lunch([self])
 
     def generate_daily_meeting(self):
         """
@@ -364,32 +749,7 @@ class Person:
         
         :return: None
         """
-        # Arrive maximum 3 min early, 2 min late
-        meeting_attend = int(np.random.exponential(3 * 60))
-        meeting_attend = self.source.daily_report - max(meeting_attend, 5 * 60)
-
-        pass_zones = self.source.get_path(self.office, self.source.meeting_room)
-        pass_zones.pop(0)
-        zone_move_timer = [meeting_attend]
-        # TODO: Trespass time
-        temp_timer = meeting_attend
-        for _ in pass_zones[:-1]:
-            temp_timer = temp_timer - 3 + get_white_bias(1)
-            zone_move_timer.insert(0, temp_timer)
-
-        zone_move_timer.append(self.source.daily_report +
-                               int(np.random.normal(self.source.daily_report_mean, self.source.daily_report_std)))
-
-        temp_timer = zone_move_timer[-1]
-        for _ in pass_zones[:-1]:
-            temp_timer = temp_timer + 3 + get_white_bias(1)
-            zone_move_timer.append(temp_timer)
-
-        # Apply to the daily route
-        for i in range(len(zone_move_timer) - 1):
-            self.position[zone_move_timer[i]:zone_move_timer[i + 1]] = \
-                self.source.possible_locations.index(
-                    pass_zones[len(pass_zones) - abs(i - len(pass_zones) + 1) - 1])
+        self.source.simulate_meeting([self])
 
     def check_in_office(self, start, end):
         """
@@ -401,21 +761,15 @@ class Person:
         
         :return: Return True if the occupant is in his/her office between given time, and False otherwise.
         """
-        return np.sum(self.position[start:end] == self.source.possible_locations.index(self.office)) == (end - start)
+        return self.position.covers(start, end, self.source.possible_locations.index(self.office))
 
     def get_in_office_range(self):
         """
         Find all times that the occupant is in his/her office.
         :return: list of timeslots that the occupant is in the office
         """
-        in_office = np.concatenate(([0],
-                                    np.equal(self.position,
-                                             self.source.possible_locations.index(self.office)).view(np.int8),
-                                    [0]))
-        absdiff = np.abs(np.diff(in_office))
-        # Runs start and end where absdiff is 1.
-        ranges = np.where(absdiff == 1)[0].reshape(-1, 2)
-        return ranges
+        ranges = self.position.ranges(self.source.possible_locations.index(self.office))
+        return np.array(ranges, dtype=np.int64).reshape(-1, 2)
 
     def handle_customer(self, num_customer):
         """
@@ -427,58 +781,62 @@ class Person:
         """
         # Set-up meeting time
         in_office_range = self.get_in_office_range()
-        visit_length = int(np.random.normal(self.source.average_stay_customer, self.source.std_stay_customer))
+        visit_length = int(self.source.rng.normal(self.source.average_stay_customer, self.source.std_stay_customer))
         in_office_duration = in_office_range[:, 1] - in_office_range[:, 0]
         in_office_idx = np.nonzero(in_office_duration > visit_length)[0]
         if len(in_office_idx) == 0:
             visit_length = np.max(in_office_duration)
             in_office_idx = np.nonzero(in_office_duration == visit_length)[0]
-        idx = np.random.choice(in_office_idx)
-        start_time = np.random.randint(in_office_range[idx, 0], in_office_range[idx, 1] - visit_length + 1)
+        idx = self.source.rng.choice(in_office_idx)
+        start_time = self.source.rng.integers(in_office_range[idx, 0], in_office_range[idx, 1] - visit_length + 1)
         end_time = start_time + visit_length
 
-        in_room = start_time + 10 + get_white_bias(1)
-        out_room = end_time - 10 + get_white_bias(1)
+        in_room = start_time + 10 + get_white_bias(1, rng=self.source.rng)
+        out_room = end_time - 10 + get_white_bias(1, rng=self.source.rng)
 
         # Decide meeting location
         if num_customer > 1:
             # Go meet in meeting room
             room_name = self.source.meeting_room
-            self.position[in_room:out_room] = self.source.possible_locations.index(self.source.meeting_room)
+            self.position.paint(in_room, out_room, self.source.possible_locations.index(self.source.meeting_room))
         else:
-            self.position[in_room:out_room] = self.source.possible_locations.index("busy")
+            self.position.paint(in_room, out_room, self.source.possible_locations.index("busy"))
             room_name = self.office
+        self.source.availability.refresh(self)
 
         return in_room, out_room, room_name
 
     def generate_go_other_office(self):
         """
         Generate the event of visiting colleagues' office for random talk. Only possible if the colleague is in the office.
+        The colleagues are found from the ``availability`` index of the generator.
         
         :return: None.
         """
-        for _ in range(np.random.poisson(self.source.visit_colleague)):
+        for _ in range(self.source.rng.poisson(self.source.visit_colleague)):
             # Find available time for current person to meet some colleague
             in_office_range = self.get_in_office_range()
-            visit_length = int(np.random.normal(self.source.average_stay_in_colleague_office,
-                                                self.source.std_stay_in_colleague_office))
+            visit_length = int(self.source.rng.normal(self.source.average_stay_in_colleague_office,
+                                                      self.source.std_stay_in_colleague_office))
             in_office_idx = np.nonzero((in_office_range[:, 1] - in_office_range[:, 0]) > visit_length)[0]
             if len(in_office_idx) == 0:
                 continue
-            idx = np.random.choice(in_office_idx)
-            start_time = np.random.randint(in_office_range[idx, 0], in_office_range[idx, 1] - visit_length + 1)
+            idx = self.source.rng.choice(in_office_idx)
+            start_time = self.source.rng.integers(in_office_range[idx, 0], in_office_range[idx, 1] - visit_length + 1)
             end_time = start_time + visit_length
 
             # Find available colleague
-            for coworker in self.source.worker_assign:
-                if coworker.check_in_office(start_time, end_time):
-                    # Go meet the colleague
-                    in_colleague = start_time + 10 + get_white_bias(1)
-                    out_colleague = end_time - 10 + get_white_bias(1)
+            coworker = self.source.availability.find(start_time, end_time, exclude=self)
+            if coworker is None:
+                continue
+            # Go meet the colleague
+            in_colleague = start_time + 10 + get_white_bias(1, rng=self.source.rng)
+            out_colleague = end_time - 10 + get_white_bias(1, rng=self.source.rng)
 
-                    self.position[in_colleague:out_colleague] = self.source.possible_locations.index(coworker.office)
-                    coworker.position[in_colleague:out_colleague] = self.source.possible_locations.index("busy")
-                    break
+            self.position.paint(in_colleague, out_colleague, self.source.possible_locations.index(coworker.office))
+            coworker.position.paint(in_colleague, out_colleague, self.source.possible_locations.index("busy"))
+            self.source.availability.refresh(self)
+            self.source.availability.refresh(coworker)
 
     def generate_daily_route(self, customer_list):
         """
@@ -488,9 +846,20 @@ class Person:
         
         :return: List of appointment times.
         """
-        time_list = list()
         self.generate_lunch()
         self.generate_daily_meeting()
+        return self.generate_appointments(customer_list)
+
+    def generate_appointments(self, customer_list):
+        """
+        Generate the appointments with the customers and the visits to colleagues, after the lunch and the meeting are
+        decided.
+
+        :parameter customer_list: List of Person that will visit the occupant today.
+
+        :return: List of appointment times.
+        """
+        time_list = list()
         for num_customer in customer_list:
             time_list.append(self.handle_customer(num_customer))
         self.generate_go_other_office()
@@ -504,29 +873,295 @@ class Person:
         
         :return: The zone entry of the location at the given time.
         """
-        if self.position[sec] == self.source.possible_locations.index("busy"):
+        location = self.position.get(sec)
+        if location == self.source.possible_locations.index("busy"):
             return self.office
-        return self.source.possible_locations[int(self.position[sec])]
+        return self.source.possible_locations[location]
 
     def get_trigger(self):
         pass
 
 
-def get_white_bias(second):
+class Trajectory:
+    """
+    The locations of an occupant during a day, stored as the change points of the location instead of one value per
+    second. Each segment starts at a change point and lasts until the next one, and adjacent segments always have
+    different locations.
+    """
+
+    def __init__(self, length, location=0):
+        """
+        :parameter length: The length of the day in seconds.
+
+        :parameter location: The initial location index for the whole day.
+        """
+        self.length = length
+        self.times = [0]
+        self.locations = [location]
+
+    def paint(self, start, end, location):
+        """
+        Set the location during a period of time, the same as ``position[start:end] = location`` on the per-second array.
+
+        :parameter start: The start time.
+
+        :parameter end: The end time (exclusive).
+
+        :parameter location: The location index.
+
+        :return: None
+        """
+        start = max(int(start), 0)
+        end = min(int(end), self.length)
+        if start >= end:
+            return
+        times, locations = self.times, self.locations
+        i = bisect_right(times, start) - 1
+        j = bisect_right(times, end) - 1
+        if end < self.length:
+            right_times = [end] + times[j + 1:]
+            right_locations = [locations[j]] + locations[j + 1:]
+        else:
+            right_times, right_locations = [], []
+        if times[i] == start:
+            left_times, left_locations = times[:i], locations[:i]
+        else:
+            left_times, left_locations = times[:i + 1], locations[:i + 1]
+        if not left_locations or left_locations[-1] != location:
+            left_times.append(start)
+            left_locations.append(location)
+        if right_locations and right_locations[0] == location:
+            right_times, right_locations = right_times[1:], right_locations[1:]
+        self.times = left_times + right_times
+        self.locations = left_locations + right_locations
+
+    def get(self, time):
+        """
+        :parameter time: The time to check.
+
+        :return: The location index at the given time.
+        """
+        return self.locations[bisect_right(self.times, time) - 1]
+
+    def covers(self, start, end, location):
+        """
+        :parameter start: The start time.
+
+        :parameter end: The end time (exclusive).
+
+        :parameter location: The location index.
+
+        :return: True if the occupant stays in the location during the whole period of time.
+        """
+        if start >= end:
+            return start == end
+        if start < 0 or end > self.length:
+            return False
+        i = bisect_right(self.times, start) - 1
+        j = bisect_left(self.times, end)
+        return all(current == location for current in self.locations[i:j])
+
+    def sample(self, times):
+        """
+        :parameter times: A sorted numpy array of the times to check.
+
+        :return: A numpy array of the location index at each given time.
+        """
+        return np.asarray(self.locations)[np.searchsorted(self.times, times, side='right') - 1]
+
+    def ranges(self, location):
+        """
+        :parameter location: The location index.
+
+        :return: List of (start, end) of all periods that the occupant stays in the location.
+        """
+        bounds = self.times + [self.length]
+        return [(bounds[k], bounds[k + 1]) for k, current in enumerate(self.locations) if current == location]
+
+    def to_array(self, dtype=np.int16, out=None):
+        """
+        Expand to the location index of every second.
+
+        :parameter dtype: The data type of the array.
+
+        :parameter out: The array to write into, if given.
+
+        :return: A numpy array with the length of the day.
+        """
+        locations = np.repeat(np.asarray(self.locations, dtype=dtype), np.diff(self.times + [self.length]))
+        if out is None:
+            return locations
+        out[:] = locations
+        return out
+
+
+class OfficeAvailability:
+    """
+    The periods that the workers stay in their offices, indexed to find a worker who is in the office during a given
+    period in O(log n) instead of checking every worker. The periods are kept in a segment tree over the seconds of the
+    day, where each node holds the latest end time of the periods that start within its range. A worker is in the
+    office during [start, end) if one of the periods starting before start ends after end.
+    """
+
+    empty = (-1, 0)
+
+    def __init__(self, length):
+        """
+        tree: list
+            The segment tree, each node is (end, -owner) of the latest ending period in its range
+        starts: dict
+            start time -> list of (end, -owner) of the periods that start at the time
+        periods: list
+            owner -> list of (start, end) of the periods of the worker in the index
+
+        :parameter length: The length of the day in seconds.
+        """
+        self.size = 1 << max(int(length) - 1, 0).bit_length()
+        self.tree = [self.empty] * (2 * self.size)
+        self.starts = dict()
+        self.people = list()
+        self.owners = dict()
+        self.locations = list()
+        self.periods = list()
+
+    def _update(self, start):
+        entries = self.starts.get(start)
+        tree = self.tree
+        node = self.size + start
+        tree[node] = max(entries) if entries else self.empty
+        node //= 2
+        while node:
+            best = max(tree[2 * node], tree[2 * node + 1])
+            if tree[node] == best:
+                break
+            tree[node] = best
+            node //= 2
+
+    def _insert(self, owner, start, end):
+        self.starts.setdefault(start, list()).append((end, -owner))
+        self._update(start)
+
+    def _remove(self, owner, start, end):
+        entries = self.starts[start]
+        entries.remove((end, -owner))
+        if not entries:
+            del self.starts[start]
+        self._update(start)
+
+    def add(self, person, location):
+        """
+        Add a worker to the index with the current periods in the office.
+
+        :parameter person: The ``Person`` object.
+
+        :parameter location: The location index of the office of the person.
+
+        :return: None
+        """
+        self.owners[person] = len(self.people)
+        self.people.append(person)
+        self.locations.append(location)
+        self.periods.append(list())
+        self.refresh(person)
+
+    def refresh(self, person):
+        """
+        Update the periods of a worker after the daily route is changed. People not in the index are ignored.
+
+        :parameter person: The ``Person`` object.
+
+        :return: None
+        """
+        owner = self.owners.get(person)
+        if owner is None:
+            return
+        old_periods = self.periods[owner]
+        new_periods = person.position.ranges(self.locations[owner])
+        for start, end in set(old_periods).difference(new_periods):
+            self._remove(owner, start, end)
+        for start, end in set(new_periods).difference(old_periods):
+            self._insert(owner, start, end)
+        self.periods[owner] = new_periods
+
+    def _latest(self, time):
+        # The latest ending period among the periods start no later than the time
+        best = self.empty
+        left, right = self.size, self.size + time + 1
+        while left < right:
+            if left & 1:
+                best = max(best, self.tree[left])
+                left += 1
+            if right & 1:
+                right -= 1
+                best = max(best, self.tree[right])
+            left //= 2
+            right //= 2
+        return best
+
+    def find(self, start, end, exclude=None):
+        """
+        Find a worker who stays in the office during the whole period of time. The one stays the longest after the
+        period is chosen.
+
+        :parameter start: The start time.
+
+        :parameter end: The end time (exclusive).
+
+        :parameter exclude: The ``Person`` object to skip, e.g. the one who is looking for a colleague.
+
+        :return: The ``Person`` object, or None if nobody is available.
+        """
+        if start >= end or start < 0 or start >= self.size:
+            return None
+        owner = self.owners.get(exclude)
+        # Only the periods start no later than the start time can be found
+        hidden = [] if owner is None else [period for period in self.periods[owner] if period[0] <= start]
+        for period in hidden:
+            self._remove(owner, *period)
+        latest_end, owner_key = self._latest(start)
+        for period in hidden:
+            self._insert(owner, *period)
+        if latest_end < end:
+            return None
+        return self.people[-owner_key]
+
+
+def get_walk_offsets(num_people, num_zones, rng):
+    """
+    Generate the times to walk through the zones, each zone takes 3 seconds with a bias.
+
+    :parameter num_people: Number of people that walk.
+
+    :parameter num_zones: Number of zones to pass.
+
+    :parameter rng: The ``numpy.random.Generator`` to draw the biases from.
+
+    :return: A numpy matrix of (num_people, num_zones), the time offsets to enter each zone since entering the first zone.
+    """
+    offsets = np.zeros((num_people, num_zones), dtype=np.int64)
+    offsets[:, 1:] = np.cumsum(3 + get_white_bias(1, (num_people, num_zones - 1), rng=rng), axis=1)
+    return offsets
+
+
+def get_white_bias(second, size=None, *, rng):
     """
     Generate a bias.
     
     :parameter second: Value range.
+
+    :parameter size: The shape of the biases to generate at once. If None, generate a single bias.
+
+    :parameter rng: The ``numpy.random.Generator`` to draw the biases from, usually the stream of the current day.
     
     :return: Bias.
     """
-    return np.random.randint(second * 2 + 1) - second
+    return rng.integers(second * 2 + 1, size=size) - second
 
 
 def main():
     all_people = generate_daily_data()
     for person in all_people:
-        print(person.position.size)
+        print(person.position.length)
         # print(list(person.position))
 
     # current = start_synthetic_data
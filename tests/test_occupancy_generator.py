@@ -0,0 +1,70 @@
+"""
+Compare the Schedule:Compact and the Schedule:File output of ``OccupancyGenerator.generate_daily_schedule``. Set the
+ENERGYPLUS_FOLDER environment variable to the EnergyPlus installation, the tests are skipped if it is not found.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model import Model
+from occupancy_generator import OccupancyGenerator
+
+energyplus_folder = os.environ.get("ENERGYPLUS_FOLDER", "/usr/local/EnergyPlus-9-3-0/")
+building = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "buildings", "5ZoneAirCooled.idf")
+date = datetime(2020, 3, 2)
+
+pytestmark = pytest.mark.skipif(not os.path.isfile(os.path.join(energyplus_folder, "Energy+.idd")),
+                                reason="EnergyPlus is not installed")
+
+
+@pytest.fixture(scope="module")
+def schedules(tmp_path_factory):
+    if not Model.model_import_flag:
+        Model.set_energyplus_folder(os.path.join(energyplus_folder, ""))
+    results = dict()
+    for schedule_file in (False, True):
+        model = Model(idf_file_name=building, weather_file=None)
+        generator = OccupancyGenerator(model, num_occupant=20, seed=0)
+        commands, _, zone_occupancy, _ = generator.generate_daily_schedule(
+            date=date, schedule_file=schedule_file,
+            schedule_path=str(tmp_path_factory.mktemp("schedule") / "occupancy.csv"))
+        people = [list(entry.fieldvalues) for entry in model.get_configuration("People")
+                  if entry.Number_of_People_Schedule_Name.startswith("Generated_Schedule_Zone_")]
+        results[schedule_file] = (commands, zone_occupancy, people)
+        model.close()
+    return results
+
+
+def test_people_objects_match(schedules):
+    _, _, compact_people = schedules[False]
+    _, _, file_people = schedules[True]
+    assert compact_people
+    assert compact_people == file_people
+
+
+def test_schedule_units_match(schedules):
+    compact_commands, zone_occupancy, _ = schedules[False]
+    file_commands, file_occupancy, _ = schedules[True]
+    np.testing.assert_array_equal(zone_occupancy, file_occupancy)
+
+    day = date.timetuple().tm_yday - 1
+    rows = np.loadtxt(file_commands[0]["File Name"], delimiter=",", skiprows=1, ndmin=2)
+    rows = rows[day * 24 * 60:(day + 1) * 24 * 60]
+    for command in compact_commands:
+        # Expand the Until fields of the Schedule:Compact to the value of every minute
+        values = np.zeros(24 * 60)
+        start = 0
+        fields = [command[f"Field {i}"] for i in range(3, 3 + 2 * 24 * 60) if f"Field {i}" in command]
+        for until, value in zip(fields[::2], fields[1::2]):
+            hour, minute = until.split()[1].split(":")
+            end = int(hour) * 60 + int(minute)
+            values[start:end] = float(value)
+            start = end
+        column = [schedule["Name"] for schedule in file_commands].index(command["Name"])
+        np.testing.assert_array_equal(values, rows[:, column])
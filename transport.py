@@ -0,0 +1,224 @@
+import numpy as np
+from multiprocessing import Event, Pipe, Semaphore
+from multiprocessing.shared_memory import SharedMemory
+
+
+class PipeTransport:
+    """
+    Exchange the states and actions between the EnergyPlus process and the ``Model`` by pickling them through a ``Pipe``.
+    """
+
+    def __init__(self):
+        self.parent, self.child = Pipe(duplex=True)
+        self.wait_for_step = Event()
+        self.wait_for_state = Event()
+        self.keys = list()
+
+    def send_state(self, state):
+        """
+        Called by the EnergyPlus process to send the state vector of the current timestep.
+
+        :parameter state: The state vector.
+
+        :return: None
+        """
+        self.child.send(state)
+        self.wait_for_state.set()
+
+    def recv_actions(self):
+        """
+        Called by the EnergyPlus process to wait for the events of the current timestep.
+
+        :return: The events in the format of ``EventQueue.trigger()``. The targets of the keys are in ``keys``.
+        """
+        self.wait_for_step.clear()
+        if not self.child.poll():
+            self.wait_for_step.wait()
+        events, new_keys = self.child.recv()
+        self.keys.extend(new_keys)
+        return events
+
+    def terminate(self):
+        """
+        Called by the EnergyPlus process when the simulation is finished.
+
+        :return: None
+        """
+        self.child.send("Terminated")
+        self.wait_for_state.set()
+
+    def send_actions(self, events, keys):
+        """
+        Called by the ``Model`` to send the events of the current timestep and release the EnergyPlus process.
+
+        :parameter events: The events in the format of ``EventQueue.trigger()``.
+
+        :parameter keys: The control targets registered in the ``EventQueue``. Only the new targets are sent.
+
+        :return: None
+        """
+        new_keys = keys[len(self.keys):]
+        self.parent.send((events, new_keys))
+        self.keys.extend(new_keys)
+        self.wait_for_state.clear()
+        self.wait_for_step.set()
+
+    def recv_state(self):
+        """
+        Called by the ``Model`` to wait for the state vector of the next timestep.
+
+        :return: The state vector, or None if the simulation is finished.
+        """
+        if not self.parent.poll():
+            self.wait_for_state.wait()
+        self.wait_for_state.clear()
+        state = self.parent.recv()
+        if isinstance(state, str):
+            return None
+        return state
+
+    def close(self):
+        """
+        Release the resources once the simulation is finished.
+
+        :return: None
+        """
+        self.parent.close()
+        self.child.close()
+
+
+class SharedMemoryTransport:
+    """
+    Exchange the state and action vectors through ``multiprocessing.shared_memory`` with a fixed layout, so no pickling
+    or pipe syscall is needed in the per-step round trip. The handoff is coordinated by two semaphores.
+
+    The key of each control target in the ``EventQueue`` is its slot in the action vector. Only the new control targets
+    are sent through a pipe, which only happens at the first few timesteps.
+    """
+
+    def __init__(self, state_size, max_actions=256):
+        """
+        :parameter state_size: The size of the state vector.
+
+        :parameter max_actions: The maximum number of distinct actuators and global variables controlled during the simulation.
+        """
+        self.state_size = state_size
+        self.max_actions = max_actions
+        self.memory = SharedMemory(create=True, size=8 * (2 + state_size + 2 * max_actions))
+        self.state_ready = Semaphore(0)
+        self.actions_ready = Semaphore(0)
+        self.parent, self.child = Pipe(duplex=True)
+        self.keys = list()
+        self._map()
+        self.header[:] = 0
+        self.action_flags[:] = 0
+
+    def _map(self):
+        buffer = np.ndarray((2 + self.state_size + 2 * self.max_actions,), dtype=np.float64, buffer=self.memory.buf)
+        # header: [terminated, number of registered control targets]
+        self.header = buffer[:2]
+        self.state = buffer[2:2 + self.state_size]
+        self.action_values = buffer[2 + self.state_size:2 + self.state_size + self.max_actions]
+        self.action_flags = buffer[2 + self.state_size + self.max_actions:]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ("header", "state", "action_values", "action_flags"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map()
+
+    def send_state(self, state):
+        """
+        Called by the EnergyPlus process to send the state vector of the current timestep.
+
+        :parameter state: The state vector.
+
+        :return: None
+        """
+        self.state[:] = state
+        self.state_ready.release()
+
+    def recv_actions(self):
+        """
+        Called by the EnergyPlus process to wait for the events of the current timestep.
+
+        :return: The events in the format of ``EventQueue.trigger()``. Priority and note are not transferred. The targets of the keys are in ``keys``. None if the ``Model`` asks to terminate.
+        """
+        if self.header[0]:
+            return None
+        self.actions_ready.acquire()
+        if self.header[0]:
+            return None
+        if int(self.header[1]) > len(self.keys):
+            self.keys.extend(self.child.recv())
+        events = {"actuator": dict(), "global": dict()}
+        for key in np.flatnonzero(self.action_flags).tolist():
+            events[self.keys[key][0]][key] = [None, float(self.action_values[key]), None]
+        return events
+
+    def terminate(self):
+        """
+        Called by the EnergyPlus process when the simulation is finished.
+
+        :return: None
+        """
+        self.header[0] = 1
+        self.state_ready.release()
+
+    def send_actions(self, events, keys):
+        """
+        Called by the ``Model`` to send the events of the current timestep and release the EnergyPlus process.
+
+        :parameter events: The events in the format of ``EventQueue.trigger()``.
+
+        :parameter keys: The control targets registered in the ``EventQueue``. Only the new targets are sent.
+
+        :return: None
+        """
+        if len(keys) > len(self.keys):
+            if len(keys) > self.max_actions:
+                # Release the EnergyPlus process with the terminate flag, so it does not wait forever
+                self.header[0] = 1
+                self.actions_ready.release()
+                raise ValueError(f"More than {self.max_actions} control targets, increase max_actions")
+            new_keys = keys[len(self.keys):]
+            self.parent.send(new_keys)
+            self.keys.extend(new_keys)
+            self.header[1] = len(self.keys)
+        self.action_flags[:] = 0
+        for type in ("actuator", "global"):
+            for key, event in events[type].items():
+                self.action_values[key] = event[1]
+                self.action_flags[key] = 1
+        self.actions_ready.release()
+
+    def recv_state(self):
+        """
+        Called by the ``Model`` to wait for the state vector of the next timestep.
+
+        :return: A copy of the state vector, or None if the simulation is finished.
+        """
+        self.state_ready.acquire()
+        if self.header[0]:
+            return None
+        return self.state.copy()
+
+    def close(self):
+        """
+        Release the shared memory once the simulation is finished. Must be called by the ``Model``. Calling it again
+        does nothing.
+
+        :return: None
+        """
+        if self.memory is None:
+            return
+        self.header = self.state = self.action_values = self.action_flags = None
+        self.parent.close()
+        self.child.close()
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
@@ -0,0 +1,214 @@
+import shutil
+import tempfile
+import numpy as np
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+
+from model import Model
+from observation import State
+
+
+def _worker(connection, energyplus_folder, model_arguments, working_directory):
+    """
+    Run one ``Model`` in its own working directory and serve the commands from the ``VectorModel``.
+
+    :parameter connection: The worker end of the pipe.
+
+    :parameter energyplus_folder: The installation path of the EnergyPlus.
+
+    :parameter model_arguments: The keyword arguments to create the ``Model``.
+
+    :parameter working_directory: The folder that holds the input IDF and the output files of this worker.
+
+    :return: None
+    """
+    try:
+        if not Model.model_import_flag:
+            Model.set_energyplus_folder(energyplus_folder)
+        model = Model(run_directory=working_directory, **model_arguments)
+    except Exception as error:
+        connection.send(("error", repr(error)))
+        connection.close()
+        return
+    connection.send(("ok", None))
+    while True:
+        command, data = connection.recv()
+        if command == "close":
+            model.close()
+            break
+        try:
+            if command == "reset":
+                state = model.reset()
+                connection.send(("ok", (model.observation_spec, state.vector)))
+            elif command == "step":
+                state = model.step(data)
+                connection.send(("ok", (state.vector, model.is_terminate())))
+            else:
+                raise ValueError(f"Unknown command {command}")
+        except Exception as error:
+            connection.send(("error", repr(error)))
+    connection.close()
+
+
+class VectorModel:
+    """
+    Run multiple buildings in parallel. Each building is simulated by a ``Model`` in its own worker process and working
+    directory, and the ``reset`` and ``step`` are batched over all buildings. All buildings must have the same state
+    layout, so their states can be stacked into one matrix.
+    """
+
+    def __init__(self,
+                 model_arguments: list,
+                 working_directory: str = None,
+                 keep_files: bool = False):
+        """
+        Start one worker process for each building.
+
+        :parameter model_arguments: List of dictionaries contains the keyword arguments of ``Model`` for each building.
+
+        :parameter working_directory: The folder to create the working directories of the workers. Default is the system temporary folder. Use a tmpfs location such as /dev/shm to keep the EnergyPlus output in memory.
+
+        :parameter keep_files: Set to True to keep the working directories after ``close``.
+        """
+        if not Model.model_import_flag:
+            raise ImportError("You have to set the energyplus folder first")
+        self.num_envs = len(model_arguments)
+        self.keep_files = keep_files
+        self.working_directories = list()
+        self.connections = list()
+        self.workers = list()
+        self.observation_specs = [None] * self.num_envs
+        self.current_states = [None] * self.num_envs
+        self.terminated = np.zeros(self.num_envs, dtype=bool)
+
+        try:
+            for i, arguments in enumerate(model_arguments):
+                folder = tempfile.mkdtemp(prefix=f"cobs_{i}_", dir=working_directory)
+                self.working_directories.append(folder)
+                parent, child = Pipe(duplex=True)
+                worker = Process(target=_worker, args=(child, Model.energyplus_folder, arguments, folder))
+                worker.start()
+                child.close()
+                self.connections.append(parent)
+                self.workers.append(worker)
+            self._recv_all(range(self.num_envs))
+        except BaseException:
+            self._abort()
+            raise
+
+    def _recv_all(self, indices):
+        """
+        Read the replies of the given workers. All replies are read before an error is raised, so no reply is left in
+        the pipes to be mistaken for the reply of a later command. A worker that exits without a reply is reported as
+        an error instead of blocking forever.
+
+        :parameter indices: The indices of the workers that are sent a command.
+
+        :return: List of the reply data in the same order.
+        """
+        results = list()
+        errors = list()
+        for i in indices:
+            connection = self.connections[i]
+            worker = self.workers[i]
+            # The sentinel is kept open by the simulation process that the worker forks, so also check the worker
+            while not wait([connection, worker.sentinel], timeout=1) and worker.is_alive():
+                pass
+            try:
+                if not connection.poll():
+                    raise EOFError
+                status, data = connection.recv()
+            except EOFError:
+                status, data = "error", "the worker process exited"
+            if status == "error":
+                errors.append(f"Worker {i} failed: {data}")
+            results.append(data)
+        if errors:
+            raise RuntimeError("\n".join(errors))
+        return results
+
+    def _abort(self):
+        """
+        Stop all started workers and remove all working directories after an error during the setup.
+
+        :return: None
+        """
+        for connection in self.connections:
+            try:
+                connection.send(("close", None))
+            except OSError:
+                pass
+            connection.close()
+        for worker in self.workers:
+            worker.terminate()
+            worker.join()
+        for folder in self.working_directories:
+            shutil.rmtree(folder, ignore_errors=True)
+        self.connections = list()
+        self.workers = list()
+
+    def _wrap_state(self, i, values):
+        return State(self.observation_specs[i], values, {"occupancy": dict()})
+
+    def reset(self):
+        """
+        Reset all buildings and start the simulations.
+
+        :return: A numpy matrix of the initial state vectors with one row per building. The named view of each building is in ``current_states``.
+        """
+        for connection in self.connections:
+            connection.send(("reset", None))
+        for i, (observation_spec, values) in enumerate(self._recv_all(range(self.num_envs))):
+            self.observation_specs[i] = observation_spec
+            self.current_states[i] = self._wrap_state(i, values)
+        self.terminated[:] = False
+        for i, observation_spec in enumerate(self.observation_specs):
+            if observation_spec.layout != self.observation_specs[0].layout:
+                raise ValueError(f"Building {i} has a different state layout from building 0")
+        return np.stack([state.vector for state in self.current_states])
+
+    def step(self, actions_batch: list):
+        """
+        Send the actions to all buildings, and then generate the state values of the next timestep. Buildings that
+        have finished the simulation are skipped and keep their last state.
+
+        :parameter actions_batch: List of the action lists of all buildings, each in the format of ``Model.step()``.
+
+        :return: A numpy matrix of the state vectors with one row per building.
+        """
+        running = np.flatnonzero(~self.terminated)
+        for i in running:
+            self.connections[i].send(("step", actions_batch[i]))
+        for i, (values, terminated) in zip(running, self._recv_all(running)):
+            self.terminated[i] = terminated
+            self.current_states[i] = self._wrap_state(i, values)
+        return np.stack([state.vector for state in self.current_states])
+
+    def is_terminate(self):
+        """
+        Determine if the simulations of all buildings are finished or not.
+
+        :return: True if all simulations are done, and False otherwise.
+        """
+        return bool(np.all(self.terminated))
+
+    def close(self):
+        """
+        Stop all workers and remove their working directories.
+
+        :return: None
+        """
+        for connection in self.connections:
+            try:
+                connection.send(("close", None))
+            except OSError:
+                # The worker has already exited
+                pass
+            connection.close()
+        for worker in self.workers:
+            worker.join()
+        if not self.keep_files:
+            for folder in self.working_directories:
+                shutil.rmtree(folder, ignore_errors=True)
+        self.connections = list()
+        self.workers = list()